@@ -6,6 +6,7 @@ Gerenciador de configurações do sistema
 
 import json
 import logging
+from contextlib import contextmanager
 from pathlib import Path
 
 
@@ -56,6 +57,10 @@ class Config:
             'show_labels': False,
             'show_zone_tags': True,
 
+            # Seletor de pastas do Qt em vez do nativo (no Windows o nativo inicializa COM/Shell
+            # e pode demorar a abrir; o do Qt abre rápido, mas com visual diferente do sistema)
+            'fast_file_dialog': False,
+
             # Configurações de Fila
             'queue_config': {
                 'enabled': True,
@@ -66,6 +71,9 @@ class Config:
                 'polygon': []             # Pontos do polígono [(x,y), ...] normalizados 0-1
             }
         }
+        # Controle de batch(): profundidade de aninhamento e se houve set() pendente de gravação
+        self._batch_depth = 0
+        self._dirty = False
         self.load()
 
     def load(self):
@@ -173,6 +181,23 @@ class Config:
     def get(self, key, default=None):
         return self.config.get(key, self.default_config.get(key, default))
 
-    def set(self, key, value):
+    def set(self, key, value, save=True):
+        """Define uma chave; com save=False só altera a memória (quem chama faz o save())"""
         self.config[key] = value
-        self.save()
+        if save:
+            if self._batch_depth:
+                self._dirty = True
+            else:
+                self.save()
+
+    @contextmanager
+    def batch(self):
+        """Agrupa vários set(): nenhuma escrita em disco dentro do bloco, um único save() ao sair"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._dirty:
+                self._dirty = False
+                self.save()
@@ -18,12 +18,32 @@ RESET DIÁRIO AUTOMÁTICO:
     em memória e a tabela 'contadores' são zerados.
 """
 
+from collections import namedtuple
 from datetime import datetime, date
 import time
 import logging
 from typing import Optional
 
 
+# Ordem fixa das categorias (mesma ordem dos cards da interface)
+CATEGORIAS = ('Carros', 'Motos', 'Caminhões', 'Ônibus')
+
+# Snapshot imutável dos contadores enviado à interface: totais já somados na
+# thread de vídeo e categorias como tupla de (ida, volta) na ordem de CATEGORIAS
+CounterSnapshot = namedtuple('CounterSnapshot', 'total_ida total_volta total cats')
+
+
+def snapshot_from_dict(contadores: dict) -> CounterSnapshot:
+    """Converte a estrutura de contadores (dict por categoria/sentido) em CounterSnapshot."""
+    total_ida = contadores['total']['ida']
+    total_volta = contadores['total']['volta']
+    cats = tuple(
+        (contadores[c]['ida'], contadores[c]['volta']) if c in contadores else (0, 0)
+        for c in CATEGORIAS
+    )
+    return CounterSnapshot(total_ida, total_volta, total_ida + total_volta, cats)
+
+
 class VehicleCounter:
     """
     Gerencia contagem de veículos por categoria e sentido.
@@ -209,6 +229,10 @@ class VehicleCounter:
         """Retorna total geral de veículos contados (ida + volta)."""
         return self.contadores['total']['ida'] + self.contadores['total']['volta']
 
+    def snapshot(self) -> CounterSnapshot:
+        """Retorna os contadores atuais como CounterSnapshot (cópia segura para outra thread)."""
+        return snapshot_from_dict(self.contadores)
+
     def get_data_reset(self) -> Optional[date]:
         """Retorna a data do último reset diário (ou None se nunca resetou)."""
         return self._reset_date
@@ -13,6 +13,17 @@ from datetime import datetime
 from pathlib import Path
 
 
+def _empty_counters():
+    """Estrutura padrão de contadores: total + as quatro categorias fixas, zeradas"""
+    return {
+        'total': {'ida': 0, 'volta': 0},
+        'Carros': {'ida': 0, 'volta': 0},
+        'Motos': {'ida': 0, 'volta': 0},
+        'Caminhões': {'ida': 0, 'volta': 0},
+        'Ônibus': {'ida': 0, 'volta': 0}
+    }
+
+
 class CounterDatabase:
     """Gerencia persistência de contadores em banco SQLite"""
 
@@ -40,6 +51,10 @@ class CounterDatabase:
         self.conn = None
         self._lock = threading.Lock()  # Lock para thread-safety
         self._busy_timeout = 30.0  # Timeout ao tentar acessar banco ocupado
+        # Cache write-through dos contadores por link RTSP: {rtsp_url: (data_version, contadores)}.
+        # A API também grava na tabela (reset diário, outro processo), então cada entrada
+        # só vale enquanto o PRAGMA data_version não mudar.
+        self._counters_cache = {}
         self.init_database()
 
     def init_database(self):
@@ -105,6 +120,8 @@ class CounterDatabase:
             # Índices para a nova tabela
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_hist_v2_time ON historico_v2(timestamp DESC)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_hist_v2_cam ON historico_v2(camera_id)')
+            # Índice composto: filtro por câmera + faixa de tempo sem varrer a tabela
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_hist_v2_cam_time ON historico_v2(camera_id, timestamp)')
 
             # 3. Tabela de histórico de fila (Queue Management)
             cursor.execute('''
@@ -263,14 +280,36 @@ class CounterDatabase:
                         total_saved += valor
 
                 self.conn.commit()
+                # Cache com o mesmo formato que load_counters devolveria lendo o que foi gravado:
+                # só as categorias fixas (cópia: quem chamou segue alterando o dict)
+                cached = _empty_counters()
+                for categoria, valores in contadores.items():
+                    if categoria != 'total' and categoria in cached:
+                        cached[categoria].update(valores)
+                cached['total']['ida'] = sum(cached[cat]['ida'] for cat in cached if cat != 'total')
+                cached['total']['volta'] = sum(cached[cat]['volta'] for cat in cached if cat != 'total')
+                self._counters_cache[rtsp_url] = (self._data_version(), cached)
                 logging.debug(f"DB: Salvos {total_saved} veiculos para {rtsp_url[:30]}...")
             except Exception as e:
+                self._counters_cache.pop(rtsp_url, None)
                 logging.error(f"Erro ao salvar contadores: {e}")
 
+    def _data_version(self):
+        """
+        PRAGMA data_version da conexão: muda quando outra conexão (ex.: reset
+        diário da API) faz commit no banco. Chamar com self._lock adquirido.
+        """
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
     def load_counters(self, rtsp_url=''):
-        """Carrega contadores do banco"""
+        """Carrega contadores do banco (do cache, se o banco não foi alterado por outra conexão)"""
         with self._lock:  # Thread-safe
             try:
+                cached = self._counters_cache.get(rtsp_url)
+                version = self._data_version()
+                if cached is not None and cached[0] == version:
+                    return {cat: dict(v) for cat, v in cached[1].items()}
+
                 cursor = self.conn.cursor()
                 cursor.execute(
                     "SELECT categoria, sentido, valor FROM contadores WHERE rtsp_url = ?",
@@ -279,13 +318,7 @@ class CounterDatabase:
                 rows = cursor.fetchall()
 
                 # Inicializar estrutura padrão
-                contadores = {
-                    'total': {'ida': 0, 'volta': 0},
-                    'Carros': {'ida': 0, 'volta': 0},
-                    'Motos': {'ida': 0, 'volta': 0},
-                    'Caminhões': {'ida': 0, 'volta': 0},
-                    'Ônibus': {'ida': 0, 'volta': 0}
-                }
+                contadores = _empty_counters()
 
                 # Preencher com valores do banco
                 for categoria, sentido, valor in rows:
@@ -298,16 +331,11 @@ class CounterDatabase:
                 contadores['total']['ida'] = total_ida
                 contadores['total']['volta'] = total_volta
 
+                self._counters_cache[rtsp_url] = (version, {cat: dict(v) for cat, v in contadores.items()})
                 return contadores
             except Exception as e:
                 logging.error(f"Erro ao carregar contadores: {e}")
-                return {
-                    'total': {'ida': 0, 'volta': 0},
-                    'Carros': {'ida': 0, 'volta': 0},
-                    'Motos': {'ida': 0, 'volta': 0},
-                    'Caminhões': {'ida': 0, 'volta': 0},
-                    'Ônibus': {'ida': 0, 'volta': 0}
-                }
+                return _empty_counters()
 
     def add_to_history(self, categoria_en, categoria, sentido, rtsp_url=''):
         """Adiciona evento ao histórico otimizado v2"""
@@ -352,6 +380,7 @@ class CounterDatabase:
                 cursor = self.conn.cursor()
                 cursor.execute("DELETE FROM contadores")
                 cursor.execute("DELETE FROM historico_v2")
+                self._counters_cache.clear()
                 # cursor.execute("DELETE FROM cameras") # Opcional: manter câmeras
                 self.conn.commit()
                 logging.info("Banco de dados limpo")
@@ -629,53 +658,117 @@ class CounterDatabase:
                 logging.error(f"Erro ao buscar URLs v2: {e}")
                 return []
 
+    def _hourly_summary_query(self, rtsp_url='', start_date=None, end_date=None, limit=500):
+        """Monta a query de resumo horário (agregação feita pelo SQLite)"""
+        query = """
+             SELECT
+                strftime('%Y-%m-%d', datetime(h.timestamp, 'unixepoch', 'localtime')) as data,
+                CAST(strftime('%H', datetime(h.timestamp, 'unixepoch', 'localtime')) AS INTEGER) as hora,
+                COUNT(*) as total,
+                SUM(CASE WHEN h.categoria_id = 1 THEN 1 ELSE 0 END) as carros,
+                SUM(CASE WHEN h.categoria_id = 2 THEN 1 ELSE 0 END) as motos,
+                SUM(CASE WHEN h.categoria_id = 3 THEN 1 ELSE 0 END) as caminhoes,
+                SUM(CASE WHEN h.categoria_id = 4 THEN 1 ELSE 0 END) as onibus
+            FROM historico_v2 h
+            JOIN cameras c ON h.camera_id = c.id
+            WHERE 1=1
+        """
+        params = []
+
+        if rtsp_url:
+            query += " AND c.rtsp_url = ?"
+            params.append(rtsp_url)
+
+        if start_date:
+            ts_start = int(datetime.strptime(start_date, '%Y-%m-%d %H:%M:%S').timestamp())
+            query += " AND h.timestamp >= ?"
+            params.append(ts_start)
+
+        if end_date:
+            ts_end = int(datetime.strptime(end_date, '%Y-%m-%d %H:%M:%S').timestamp())
+            query += " AND h.timestamp <= ?"
+            params.append(ts_end)
+
+        query += " GROUP BY data, hora ORDER BY data DESC, hora DESC LIMIT ?"
+        params.append(limit)
+
+        return query, params
+
+    @staticmethod
+    def _hourly_row_to_dict(row):
+        return {
+            'data': row[0],
+            'hora': int(row[1]),
+            'total': row[2],
+            'carros': row[3],
+            'motos': row[4],
+            'caminhoes': row[5],
+            'onibus': row[6]
+        }
+
     def get_hourly_summary(self, rtsp_url='', start_date=None, end_date=None, limit=500):
         """Resumo horário agregado"""
         with self._lock:
             try:
                 cursor = self.conn.cursor()
-                
-                query = """
-                     SELECT
-                        strftime('%Y-%m-%d', datetime(h.timestamp, 'unixepoch', 'localtime')) as data,
-                        strftime('%H', datetime(h.timestamp, 'unixepoch', 'localtime')) as hora,
-                        COUNT(*) as total,
-                        SUM(CASE WHEN h.categoria_id = 1 THEN 1 ELSE 0 END) as carros,
-                        SUM(CASE WHEN h.categoria_id = 2 THEN 1 ELSE 0 END) as motos,
-                        SUM(CASE WHEN h.categoria_id = 3 THEN 1 ELSE 0 END) as caminhoes,
-                        SUM(CASE WHEN h.categoria_id = 4 THEN 1 ELSE 0 END) as onibus
-                    FROM historico_v2 h
-                    JOIN cameras c ON h.camera_id = c.id
-                    WHERE 1=1
-                """
-                params = []
-                
-                if rtsp_url:
-                    query += " AND c.rtsp_url = ?"
-                    params.append(rtsp_url)
-                
-                # ... (lógica similar de data/hora)
-                
-                query += " GROUP BY data, hora ORDER BY data DESC, hora DESC LIMIT ?"
-                params.append(limit)
-                
+
+                query, params = self._hourly_summary_query(rtsp_url, start_date, end_date, limit)
                 cursor.execute(query, params)
                 rows = cursor.fetchall()
-                
-                return [{
-                    'data': row[0],
-                    'hora': int(row[1]),
-                    'total': row[2],
-                    'carros': row[3],
-                    'motos': row[4],
-                    'caminhoes': row[5],
-                    'onibus': row[6]
-                } for row in rows]
+
+                return [self._hourly_row_to_dict(row) for row in rows]
 
             except Exception as e:
                 logging.error(f"Erro resumo horario v2: {e}")
                 return []
 
+    def get_hourly_summary_with_totals(self, rtsp_url='', start_date=None, end_date=None, limit=500,
+                                       as_tuples=False):
+        """
+        Resumo horário agregado + totais das colunas, ambos calculados no SQLite.
+
+        Args:
+            as_tuples: Se True, as linhas são as tuplas do cursor
+                (data, hora, total, carros, motos, caminhoes, onibus) em vez de dicts
+
+        Returns:
+            tuple: (rows, totals) onde totals = {'total', 'carros', 'motos', 'caminhoes', 'onibus'}
+        """
+        empty_totals = {'total': 0, 'carros': 0, 'motos': 0, 'caminhoes': 0, 'onibus': 0}
+        with self._lock:
+            try:
+                cursor = self.conn.cursor()
+
+                query, params = self._hourly_summary_query(rtsp_url, start_date, end_date, limit)
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+
+                if not rows:
+                    return [], empty_totals
+
+                # Totais somados sobre as mesmas linhas agrupadas (respeita o LIMIT)
+                cursor.execute(f"""
+                    SELECT SUM(total), SUM(carros), SUM(motos), SUM(caminhoes), SUM(onibus)
+                    FROM ({query})
+                """, params)
+                t = cursor.fetchone()
+
+                totals = {
+                    'total': t[0] or 0,
+                    'carros': t[1] or 0,
+                    'motos': t[2] or 0,
+                    'caminhoes': t[3] or 0,
+                    'onibus': t[4] or 0
+                }
+
+                if as_tuples:
+                    return rows, totals
+                return [self._hourly_row_to_dict(row) for row in rows], totals
+
+            except Exception as e:
+                logging.error(f"Erro resumo horario com totais v2: {e}")
+                return [], empty_totals
+
     def get_24h_metrics(self, rtsp_url=''):
         """Métricas 24h"""
         with self._lock:
@@ -698,15 +791,16 @@ class CounterDatabase:
                     params.append(rtsp_url)
                     
                 query += " GROUP BY hora_grupo"
-                
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
-                
-                if not rows:
+
+                # Total e pico reduzidos em uma única passada no SQLite
+                cursor.execute(f"SELECT SUM(total), MAX(total) FROM ({query})", params)
+                row = cursor.fetchone()
+
+                if not row or row[0] is None:
                      return {'total_24h': 0, 'media_hora': 0.0, 'pico_trafego': 0}
 
-                total_24h = sum(row[0] for row in rows)
-                pico_trafego = max(row[0] for row in rows)
+                total_24h = row[0]
+                pico_trafego = row[1]
                 media_hora = total_24h / 24.0
                 
                 return {
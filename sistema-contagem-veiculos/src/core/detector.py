@@ -21,6 +21,9 @@ from .config import Config
 from .counter import VehicleCounter
 from .database import CounterDatabase
 
+# Qt >= 5.14 aceita BGR direto do OpenCV (dispensa cvtColor por frame)
+_QIMAGE_FORMAT_BGR888 = getattr(QImage, 'Format_BGR888', None)
+
 # ========================= Supressor de STDERR =========================
 # Lock global para serializar manipulação de fd 2 (stderr) entre threads.
 # Sem lock, duas threads em SuppressFFmpegOutput concorrentemente podem
@@ -65,6 +68,14 @@ try:
 except ImportError:
     PYAV_AVAILABLE = False
 
+# ========================= Decodificação por hardware =========================
+# OpenCV >= 4.5.2 aceita pedir decodificação por GPU (NVDEC/VAAPI/D3D11/QSV) ao abrir
+# o stream; builds sem suporte simplesmente não têm as constantes.
+if hasattr(cv2, 'CAP_PROP_HW_ACCELERATION') and hasattr(cv2, 'VIDEO_ACCELERATION_ANY'):
+    _HW_DECODE_PARAMS = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+else:
+    _HW_DECODE_PARAMS = None
+
 # ========================= Classes de Captura =========================
 class RTSPCapture:
     """Captura RTSP que usa PyAV (preferencial) ou OpenCV (fallback)."""
@@ -113,8 +124,21 @@ class RTSPCapture:
             os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = (
                 "rtsp_transport;tcp|rtbufsize;100M|max_delay;5000000|stimeout;5000000|allowed_media_types;video|fflags;+genpts+igndts+discardcorrupt|flags;+low_delay|skip_loop_filter;all"
             )
-        with SuppressFFmpegOutput():
-            self.cap = cv2.VideoCapture(self.url, cv2.CAP_FFMPEG)
+        self.cap = None
+        if _HW_DECODE_PARAMS is not None:
+            # Tenta decodificar na GPU. Com VIDEO_ACCELERATION_ANY o próprio backend decodifica
+            # na CPU quando não há aceleração, então isOpened() False é fonte inacessível:
+            # não reabre na CPU (dobraria a espera a cada falha/reconexão). Só cai para CPU
+            # abaixo se a build recusar os parâmetros.
+            try:
+                with SuppressFFmpegOutput():
+                    self.cap = cv2.VideoCapture(self.url, cv2.CAP_FFMPEG, _HW_DECODE_PARAMS)
+            except Exception as e:
+                logging.debug(f"Decodificação por hardware indisponível: {e}")
+                self.cap = None
+        if self.cap is None:
+            with SuppressFFmpegOutput():
+                self.cap = cv2.VideoCapture(self.url, cv2.CAP_FFMPEG)
         if not self.cap.isOpened():
             self.cap.release()
             self.cap = None
@@ -336,7 +360,7 @@ class RTSPBufferedCapture:
 # ========================= Thread de Vídeo =========================
 class VideoThread(QThread):
     change_pixmap_signal = pyqtSignal(QImage)
-    update_counters = pyqtSignal(dict)
+    update_counters = pyqtSignal(object)  # CounterSnapshot
     update_fps = pyqtSignal(str)
     update_status = pyqtSignal(str)
     update_queue_stats = pyqtSignal(dict)  # Novo sinal para métricas de fila
@@ -379,6 +403,13 @@ class VideoThread(QThread):
         self.track_last_seen = {}
         self.track_ttl = 2.0
         self.last_frame = None
+        self.display_size = None  # (largura, altura) da área de vídeo, informada pela GUI
+        self._display_buf = None  # Destino reutilizado do cv2.resize do frame exibido
+        self._rgb_buf = None      # Destino reutilizado do cvtColor (Qt < 5.14, sem BGR888)
+        # Anel de QImages emitidos: o frame é copiado para a memória de um QImage já alocado.
+        # Se a GUI ainda segura aquele QImage, bits() faz detach (cópia) e nada é sobrescrito.
+        self._qimage_ring = [None] * 3
+        self._qimage_ring_idx = 0
 
         # Validation Config
         self.validation_enabled = bool(self.config.get('rtsp_enable_frame_validation', True))
@@ -395,6 +426,56 @@ class VideoThread(QThread):
         from .scene_drawer import SceneDrawer
         self.scene_drawer = SceneDrawer(self.config)
 
+    def _frame_to_qimage(self, frame):
+        """
+        Converte o frame anotado (BGR) no QImage exibido pela GUI.
+
+        Redimensiona para display_size e, sem Format_BGR888, converte para RGB.
+        Os destinos intermediários e o próprio QImage (anel de 3) são reutilizados
+        entre frames; só há alocação quando o tamanho muda ou a GUI ainda segura
+        o QImage daquela posição do anel.
+        """
+        out = frame
+        display_size = self.display_size
+        if display_size:
+            fh, fw = out.shape[:2]
+            scale = min(display_size[0] / fw, display_size[1] / fh)
+            if scale > 0 and abs(scale - 1.0) > 0.01:
+                size = (max(1, int(fw * scale)), max(1, int(fh * scale)))
+                buf = self._display_buf
+                if buf is None or buf.shape[1::-1] != size:
+                    buf = self._display_buf = np.empty((size[1], size[0], 3), np.uint8)
+                interp = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+                out = cv2.resize(out, size, dst=buf, interpolation=interp)
+
+        if _QIMAGE_FORMAT_BGR888 is not None:
+            img_format = _QIMAGE_FORMAT_BGR888
+        else:
+            buf = self._rgb_buf
+            if buf is None or buf.shape != out.shape:
+                buf = self._rgb_buf = np.empty(out.shape, np.uint8)
+            out = cv2.cvtColor(out, cv2.COLOR_BGR2RGB, dst=buf)
+            img_format = QImage.Format_RGB888
+
+        h, w = out.shape[:2]
+        idx = self._qimage_ring_idx
+        self._qimage_ring_idx = (idx + 1) % len(self._qimage_ring)
+        qt_img = self._qimage_ring[idx]
+        if qt_img is None or qt_img.width() != w or qt_img.height() != h or qt_img.format() != img_format:
+            qt_img = self._qimage_ring[idx] = QImage(w, h, img_format)
+
+        # CRÍTICO: copiar para a memória do QImage (os buffers acima são reutilizados)
+        bytes_per_line = qt_img.bytesPerLine()
+        ptr = qt_img.bits()
+        ptr.setsize(bytes_per_line * h)
+        dst = np.ndarray((h, w, 3), np.uint8, buffer=ptr, strides=(bytes_per_line, 3, 1))
+        np.copyto(dst, out)
+        return qt_img
+
+    def set_display_size(self, width: int, height: int):
+        """Define o tamanho da área de vídeo; os próximos frames já saem redimensionados"""
+        self.display_size = (width, height) if width > 0 and height > 0 else None
+
     def set_monitoring_active(self, active: bool):
         self.monitoring_active = active
         self.log_message.emit(f"Monitoramento {'ATIVADO' if active else 'DESATIVADO'}")
@@ -414,6 +495,16 @@ class VideoThread(QThread):
         self.config.set('hide_detection_lines', hide_detection_lines)
         # SceneDrawer pode precisar de reload ou setters, mas por enquanto assumimos que o detector usa essas flags.
 
+    def reset_tracking(self):
+        """Esquece todos os tracks (usado pelos resets de contagem da GUI)"""
+        # Dicts novos em vez de clear(): o loop de processamento pode estar iterando os antigos
+        self.track_last_center = {}
+        self.track_last_center_xy = {}
+        self.track_counted = {}
+        self.track_last_zone = {}
+        self.track_last_event_time = {}
+        self.track_last_seen = {}
+
     def load_yolo_model(self):
         # Usar is not None para não confundir string vazia com ausência de override
         modelo_path = self.model_override if self.model_override is not None else self.config.get('modelo_yolo', 'yolo11s.pt')
@@ -795,7 +886,7 @@ class VideoThread(QThread):
                     self.track_last_zone.pop(t, None)
 
                 # 11. Sinais
-                self.update_counters.emit(self.counter.contadores)
+                self.update_counters.emit(self.counter.snapshot())
                 
                 fps_counter += 1
                 if time.time() - fps_start >= 1.0:
@@ -804,11 +895,8 @@ class VideoThread(QThread):
                     fps_counter = 0
                     fps_start = time.time()
 
-                # 12. Emitir Imagem
-                rgb = cv2.cvtColor(annotated, cv2.COLOR_BGR2RGB)
-                h, w, ch = rgb.shape
-                # CRÍTICO: .copy() para evitar crash
-                qt_img = QImage(rgb.data, w, h, w*ch, QImage.Format_RGB888).copy()
+                # 12. Emitir Imagem (redimensionamento e conversão nesta thread, não na GUI)
+                qt_img = self._frame_to_qimage(annotated)
                 self.change_pixmap_signal.emit(qt_img)
 
             except Exception as e:
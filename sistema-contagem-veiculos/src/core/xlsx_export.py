@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gravação de relatórios .xlsx (xlsxwriter, openpyxl ou pyexcelerate) com escrita atômica
+"""
+
+import itertools
+import os
+
+# Bibliotecas de exportação Excel (opcionais, importadas uma única vez)
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+try:
+    from openpyxl import Workbook as OpenpyxlWorkbook
+    from openpyxl.utils import get_column_letter
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+try:
+    import pyexcelerate
+    PYEXCELERATE_AVAILABLE = True
+except ImportError:
+    PYEXCELERATE_AVAILABLE = False
+
+# Há pelo menos um backend capaz de gravar .xlsx
+HAS_XLSX = XLSXWRITER_AVAILABLE or OPENPYXL_AVAILABLE
+
+MISSING_XLSX_MSG = "Instale 'xlsxwriter':\npip install xlsxwriter"
+
+# A partir deste número de linhas o relatório é gravado com pyexcelerate (se instalado)
+_LARGE_REPORT_ROWS = 5000
+
+
+def write_xlsx(filename, rows, widths, sheet_name='Relatório'):
+    """
+    Grava as linhas diretamente no arquivo (sem DataFrame intermediário).
+    Relatórios grandes usam pyexcelerate quando disponível; os demais usam o
+    backend escolhido por _XLSX_WRITER (xlsxwriter ou openpyxl write_only).
+
+    Args:
+        filename: Caminho do arquivo .xlsx de destino
+        rows: Iterável de linhas (listas/tuplas), escritas em ordem
+        widths: Largura de cada coluna, a partir da coluna A
+        sheet_name: Nome da aba
+    """
+    if PYEXCELERATE_AVAILABLE:
+        # Lê no máximo _LARGE_REPORT_ROWS linhas à frente: só relatórios grandes vão
+        # inteiros para a memória; os pequenos seguem para o backend em streaming
+        rows = iter(rows)
+        head = list(itertools.islice(rows, _LARGE_REPORT_ROWS))
+        if len(head) >= _LARGE_REPORT_ROWS:
+            head.extend(rows)
+            _write_xlsx_pyexcelerate(filename, head, widths, sheet_name)
+            return
+        rows = head
+
+    _XLSX_WRITER(filename, rows, widths, sheet_name)
+
+
+def atomic_write(filename, write_func):
+    """
+    Executa write_func(caminho) sobre um arquivo temporário ".part" na mesma pasta
+    e substitui o destino com os.replace: leitores nunca veem um arquivo parcial.
+    """
+    tmp_path = filename + ".part"
+    try:
+        write_func(tmp_path)
+        os.replace(tmp_path, filename)
+    except Exception:
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _width_ranges(widths):
+    """Agrupa colunas consecutivas de mesma largura em faixas (first_col, last_col, width)"""
+    ranges = []
+    for col, width in enumerate(widths):
+        if ranges and ranges[-1][2] == width and ranges[-1][1] == col - 1:
+            ranges[-1][1] = col
+        else:
+            ranges.append([col, col, width])
+    return ranges
+
+
+def _write_xlsx_xlsxwriter(filename, rows, widths, sheet_name='Relatório'):
+    """Grava com xlsxwriter em modo constant_memory (linhas descarregadas em streaming)"""
+    wb = xlsxwriter.Workbook(filename, {'constant_memory': True})
+    try:
+        ws = wb.add_worksheet(sheet_name)
+        for first_col, last_col, width in _width_ranges(widths):
+            ws.set_column(first_col, last_col, width)
+        for i, row in enumerate(rows):
+            ws.write_row(i, 0, row)
+    finally:
+        wb.close()
+
+
+def _write_xlsx_pyexcelerate(filename, rows, widths, sheet_name='Relatório'):
+    """Grava relatórios grandes com pyexcelerate (monta o XML da aba em uma única passada)"""
+    wb = pyexcelerate.Workbook()
+    ws = wb.new_sheet(sheet_name, data=rows)
+    for col, width in enumerate(widths, start=1):
+        ws.set_col_style(col, pyexcelerate.Style(size=width))
+    wb.save(filename)
+
+
+def _write_xlsx_openpyxl(filename, rows, widths, sheet_name='Relatório'):
+    """Fallback de write_xlsx com openpyxl Workbook(write_only=True)"""
+    wb = OpenpyxlWorkbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    # Em write_only as larguras precisam ser definidas antes da primeira linha
+    for col, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+    for row in rows:
+        ws.append(row)
+    wb.save(filename)
+
+
+def _select_xlsx_writer():
+    """Escolhe (uma vez) o backend padrão de gravação .xlsx"""
+    if XLSXWRITER_AVAILABLE:
+        return _write_xlsx_xlsxwriter
+    if OPENPYXL_AVAILABLE:
+        return _write_xlsx_openpyxl
+    return None
+
+
+_XLSX_WRITER = _select_xlsx_writer()
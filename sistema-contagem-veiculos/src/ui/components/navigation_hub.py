@@ -14,6 +14,9 @@ from PyQt5.QtGui import QIcon, QCursor, QColor
 from ..styles import Styles, ThemeColors
 import os
 
+# Pasta de ícones do projeto (calculada uma vez na importação)
+_ICONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))), 'icons')
+
 class HubHeader(QWidget):
     """
     Header padronizado para as sub-views com botão de voltar.
@@ -111,10 +114,9 @@ class MenuCard(QFrame):
         
         # Icone
         icon_lbl = QLabel()
-        icons_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'icons')
-        icon_path = os.path.join(icons_dir, f'{icon_name}.ico')
+        icon_path = os.path.join(_ICONS_DIR, f'{icon_name}.ico')
         if not os.path.exists(icon_path):
-            icon_path = os.path.join(icons_dir, f'{icon_name}.png')
+            icon_path = os.path.join(_ICONS_DIR, f'{icon_name}.png')
         if os.path.exists(icon_path):
             icon_lbl.setPixmap(QIcon(icon_path).pixmap(48, 48))
         else:
@@ -615,15 +615,14 @@ class DashboardTab(QWidget):
         self.refresh_dashboard()
         self._last_refresh_time = time.time()
 
+    def stop_timers(self):
+        """Para todos os timers — chamar no encerramento da aplicação."""
+        self.refresh_timer.stop()
+
     def closeEvent(self):
-        """ Limpeza antes de fechar dashboard"""
+        """ Limpeza antes de fechar dashboard (não espera o worker: ver wait_worker)"""
         self._is_closing = True
         try:
-            # Parar worker
-            if self._worker and self._worker.isRunning():
-                self._worker.quit()
-                self._worker.wait(1000)
-
             # Parar timers
             if hasattr(self, 'period_filter'):
                 self.period_filter.blockSignals(True)
@@ -634,6 +633,16 @@ class DashboardTab(QWidget):
         except:
             pass
 
+    def wait_worker(self, msecs=1000):
+        """
+        Aguarda o worker em andamento terminar. Pode ser chamado fora da UI thread
+        depois de closeEvent (a partir daí _cleanup_worker não agenda deleteLater).
+        """
+        worker = self._worker
+        if worker and worker.isRunning():
+            worker.quit()
+            worker.wait(msecs)
+
     def refresh_dashboard(self):
         """Inicia atualização do dashboard em BACKGROUND"""
         # Verificar shutdown
@@ -688,7 +697,8 @@ class DashboardTab(QWidget):
         if not self._is_closing:
             self.btn_refresh.setEnabled(True)
             self.btn_refresh.setText("Atualizar")
-        self._worker.deleteLater()
+            # Encerrando: o worker pode estar sendo aguardado em wait_worker (outra thread)
+            self._worker.deleteLater()
         self._worker = None
 
     def _update_ui_simple(self, data):
@@ -5,6 +5,8 @@ Aba de Histórico - Tabela de eventos e exportação CSV
 """
 
 import csv
+import itertools
+import logging
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -13,13 +15,63 @@ from PyQt5.QtWidgets import (
     QPushButton, QLabel, QDateTimeEdit, QHeaderView, QFileDialog, QMessageBox,
     QGroupBox, QSpinBox, QComboBox, QCheckBox, QFrame, QTimeEdit, QDialog
 )
-from PyQt5.QtCore import Qt, QDateTime, QTimer, QTime
+from PyQt5.QtCore import Qt, QDateTime, QTimer, QTime, QThread, pyqtSignal
+from ..core.xlsx_export import HAS_XLSX, MISSING_XLSX_MSG, atomic_write, write_xlsx
 from .styles import Styles, ThemeColors
 
+# Rótulos de hora pré-formatados ("00:00" ... "23:00")
+_HOUR_STRS = tuple(f"{h:02d}:00" for h in range(24))
+
+# Larguras das colunas A..G do resumo horário
+_SUMMARY_WIDTHS = (20, 14, 12, 12, 12, 14, 12)
+
+
+class ExportWorker(QThread):
+    """Worker thread para gravar relatórios Excel em segundo plano"""
+    export_done = pyqtSignal(str)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, filename, write_func):
+        super().__init__()
+        self.filename = filename
+        self.write_func = write_func
+
+    def run(self):
+        try:
+            atomic_write(self.filename, self.write_func)
+            self.export_done.emit(self.filename)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.error_occurred.emit(f"Não foi possível exportar o arquivo:\n\n{str(e)}")
 
 
 class CustomExportDialog(QDialog):
     """Diálogo para exportação personalizada por data e horário limite"""
+
+    # Estilo composto uma única vez (evita reconstruir a string a cada abertura)
+    _STYLESHEET = f"""
+        QDialog {{
+            background-color: {ThemeColors.BACKGROUND};
+            color: {ThemeColors.TEXT_PRIMARY};
+        }}
+        QLabel {{
+            color: {ThemeColors.TEXT_PRIMARY};
+            font-size: 13px;
+        }}
+        QDateEdit, QTimeEdit {{
+            background-color: {ThemeColors.SURFACE};
+            color: {ThemeColors.TEXT_PRIMARY};
+            border: 1px solid {ThemeColors.BORDER};
+            border-radius: 4px;
+            padding: 5px;
+        }}
+        QPushButton {{
+            padding: 6px 12px;
+            border-radius: 4px;
+        }}
+    """
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Exportar Personalizado")
@@ -29,27 +81,7 @@ class CustomExportDialog(QDialog):
         self.selected_time = None
         
         # Estilo
-        self.setStyleSheet(f"""
-            QDialog {{
-                background-color: {ThemeColors.BACKGROUND};
-                color: {ThemeColors.TEXT_PRIMARY};
-            }}
-            QLabel {{
-                color: {ThemeColors.TEXT_PRIMARY};
-                font-size: 13px;
-            }}
-            QDateEdit, QTimeEdit {{
-                background-color: {ThemeColors.SURFACE};
-                color: {ThemeColors.TEXT_PRIMARY};
-                border: 1px solid {ThemeColors.BORDER};
-                border-radius: 4px;
-                padding: 5px;
-            }}
-            QPushButton {{
-                padding: 6px 12px;
-                border-radius: 4px;
-            }}
-        """)
+        self.setStyleSheet(self._STYLESHEET)
         
         layout = QVBoxLayout(self)
         layout.setSpacing(15)
@@ -117,49 +149,71 @@ class CustomExportDialog(QDialog):
 class HistoryTab(QWidget):
     """Aba de histórico com tabela de eventos e exportação"""
 
+    # Estilo dark mode composto uma única vez no carregamento da classe
+    _STYLESHEET = f"""
+        QWidget {{
+            background-color: {ThemeColors.BACKGROUND};
+            color: {ThemeColors.TEXT_PRIMARY};
+            font-family: 'Segoe UI', 'Roboto', 'Arial', sans-serif;
+        }}
+    """ + (
+        Styles.PANEL +
+        Styles.TABLE +
+        Styles.SCROLLBAR +
+        Styles.INPUT +
+        Styles.BUTTON_PRIMARY +
+        Styles.BUTTON_SECONDARY
+    )
+
     def __init__(self, database, config, parent=None):
         super().__init__(parent)
         self.database = database
         self.config = config
         self.current_rtsp_url = ''
+        # Cache da validação da pasta de exportação: (pasta, é_diretório).
+        # Evita stat a cada exportação (pastas de rede); invalidado ao trocar a pasta.
+        self._export_folder_valid = None
+        # Exportações em andamento (gravação do Excel fora da thread da UI)
+        self._export_workers = []
+        self._closing = False  # Marcado em stop_timers (encerramento da aplicação)
+        # Totais das colunas do último resumo (calculados pelo SQLite)
+        self._last_totals = {'total': 0, 'carros': 0, 'motos': 0, 'caminhoes': 0, 'onibus': 0}
+        # Cópia das linhas exibidas na tabela (colunas 2..6 como int), usada nas exportações
+        self._row_cache = []
+
+        # Debounce: cliques rápidos (Filtrar/Atualizar/troca de fonte) e o refresh automático geram um único refresh
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.timeout.connect(self.refresh_current_view)
+
         self.init_ui()
 
         # Timer para atualização automática periódica (configurável pelo usuário)
         self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.refresh_current_view)
+        self.refresh_timer.timeout.connect(self._request_refresh)
         # Não inicia automaticamente - usuário escolhe no dropdown
 
-        # Timer para exportação automática periódica
+        # Timer único para exportação automática:
+        # - intervalo periódico: timer recorrente
+        # - horário específico: single-shot armado até o próximo horário (sem polling)
         self.export_timer = QTimer()
-        self.export_timer.timeout.connect(self.auto_export_xlsx)
-        # Não inicia automaticamente - usuário habilita via checkbox
-
-        # Timer para verificação de horário específico (verifica a cada minuto)
-        self.export_schedule_timer = QTimer()
-        self.export_schedule_timer.timeout.connect(self.check_scheduled_export)
-        self.export_schedule_timer.setInterval(60000)  # 60 segundos
+        self.export_timer.timeout.connect(self._on_export_timer)
+        # Não inicia automaticamente - usuário habilita via dropdown
 
         # Controle de última exportação agendada
         self.last_scheduled_export_date = None
 
+    def stop_timers(self):
+        """Para todos os timers — chamar no encerramento da aplicação."""
+        self._closing = True
+        self._debounce.stop()
+        self.refresh_timer.stop()
+        self.export_timer.stop()
+
     def init_ui(self):
         """Inicializa interface da aba de histórico"""
         # Aplicar estilo dark mode ao widget principal
-        style = f"""
-            QWidget {{
-                background-color: {ThemeColors.BACKGROUND};
-                color: {ThemeColors.TEXT_PRIMARY};
-                font-family: 'Segoe UI', 'Roboto', 'Arial', sans-serif;
-            }}
-        """ + (
-            Styles.PANEL +
-            Styles.TABLE +
-            Styles.SCROLLBAR +
-            Styles.INPUT +
-            Styles.BUTTON_PRIMARY +
-            Styles.BUTTON_SECONDARY
-        )
-        self.setStyleSheet(style)
+        self.setStyleSheet(self._STYLESHEET)
 
         layout = QVBoxLayout(self)
         layout.setSpacing(20)
@@ -207,6 +261,11 @@ class HistoryTab(QWidget):
         self.end_date.setMinimumWidth(110)
         row1.addWidget(self.end_date)
 
+        # Strings de filtro em cache (recalculadas apenas quando a data muda)
+        self._recompute_date_strs()
+        self.start_date.dateChanged.connect(self._recompute_date_strs)
+        self.end_date.dateChanged.connect(self._recompute_date_strs)
+
         row1.addStretch()
 
         # Botão filtrar
@@ -214,7 +273,7 @@ class HistoryTab(QWidget):
         self.btn_filter.setMinimumHeight(36)
         self.btn_filter.setMinimumWidth(110)
         self.btn_filter.setCursor(Qt.PointingHandCursor)
-        self.btn_filter.clicked.connect(self.refresh_current_view)
+        self.btn_filter.clicked.connect(self._request_refresh)
         row1.addWidget(self.btn_filter)
 
         filters_main_layout.addLayout(row1)
@@ -250,6 +309,7 @@ class HistoryTab(QWidget):
         self.export_time_edit.setMaximumWidth(80)
         self.export_time_edit.setToolTip("Horário diário para exportação automática")
         self.export_time_edit.setVisible(False)  # Oculto por padrão
+        self.export_time_edit.timeChanged.connect(self._on_export_time_changed)
         row2.addWidget(self.export_time_edit)
 
         row2.addStretch()
@@ -269,6 +329,10 @@ class HistoryTab(QWidget):
         self.card_media = self.create_metric_card("Média/Hora", "0.0", "#8b5cf6")
         self.card_pico = self.create_metric_card("Pico de Tráfego", "0", "#10b981")
 
+        self._lbl_total_24h = self.card_total_24h.value_label
+        self._lbl_media = self.card_media.value_label
+        self._lbl_pico = self.card_pico.value_label
+
         metrics_layout.addWidget(self.card_total_24h)
         metrics_layout.addWidget(self.card_media)
         metrics_layout.addWidget(self.card_pico)
@@ -336,7 +400,7 @@ class HistoryTab(QWidget):
         self.btn_refresh = QPushButton("↻ Atualizar")
         self.btn_refresh.setMinimumHeight(40)
         self.btn_refresh.setMinimumWidth(120)
-        self.btn_refresh.clicked.connect(self.refresh_current_view)
+        self.btn_refresh.clicked.connect(self._request_refresh)
         buttons_layout.addWidget(self.btn_refresh)
 
         layout.addLayout(buttons_layout)
@@ -345,7 +409,7 @@ class HistoryTab(QWidget):
         """Define o link RTSP atual e atualiza a tabela"""
         self.current_rtsp_url = rtsp_url
         self.refresh_rtsp_sources()
-        self.refresh_current_view()
+        self._request_refresh()
 
     def refresh_rtsp_sources(self):
         """Atualiza lista de fontes RTSP no dropdown"""
@@ -370,7 +434,7 @@ class HistoryTab(QWidget):
             if index >= 0:
                 self.rtsp_filter_combo.setCurrentIndex(index)
 
-            print(f"[DEBUG] Fontes RTSP carregadas: {len(rtsp_urls)} encontradas")
+            logging.debug("Fontes RTSP carregadas: %d encontradas", len(rtsp_urls))
         except Exception as e:
             print(f"[ERRO] Falha ao carregar fontes RTSP: {e}")
 
@@ -399,9 +463,8 @@ class HistoryTab(QWidget):
 
     def update_auto_export(self, index):
         """Atualiza intervalo de exportação automática ou horário específico"""
-        # Parar timers atuais
+        # Parar timer atual
         self.export_timer.stop()
-        self.export_schedule_timer.stop()
 
         # Mostrar/ocultar seletor de horário baseado na opção
         is_scheduled = (index == 5)  # Índice 5 = "Horário Específico"
@@ -410,11 +473,7 @@ class HistoryTab(QWidget):
 
         if is_scheduled:
             # Modo: Horário Específico
-            self.export_schedule_timer.start()  # Verifica a cada 1 minuto
-            self.last_scheduled_export_date = None  # Reset do controle
-
-            export_time = self.export_time_edit.time().toString("HH:mm")
-            print(f"[INFO] Exportação agendada para: {export_time} (diariamente)")
+            self._arm_scheduled_export()
         else:
             # Modo: Intervalo periódico
             intervals = {
@@ -428,179 +487,185 @@ class HistoryTab(QWidget):
             interval = intervals.get(index, 0)
 
             if interval > 0:
+                self.export_timer.setSingleShot(False)
                 self.export_timer.start(interval)
                 minutes = interval // 60000
                 print(f"[INFO] Exportação automática ativada: {minutes} minutos")
             else:
                 print(f"[INFO] Exportação automática desativada")
 
+    def _is_scheduled_export(self):
+        return self.auto_export_combo.currentIndex() == 5
+
+    def _arm_scheduled_export(self):
+        """Arma o timer (single-shot) para disparar no próximo horário configurado"""
+        now = datetime.now()
+        scheduled_time = self.export_time_edit.time().toPyTime()
+        next_run = now.replace(hour=scheduled_time.hour, minute=scheduled_time.minute,
+                               second=0, microsecond=0)
+        # Já passou hoje (ou já exportou hoje): próximo disparo amanhã
+        if next_run <= now or self.last_scheduled_export_date == now.date():
+            next_run += timedelta(days=1)
+
+        delay_ms = int((next_run - now).total_seconds() * 1000)
+        self.export_timer.setSingleShot(True)
+        self.export_timer.start(delay_ms)
+        print(f"[INFO] Exportação agendada para: {next_run.strftime('%d/%m/%Y %H:%M')} (diariamente)")
+
+    def _on_export_time_changed(self, _time):
+        """Rearma a exportação agendada quando o horário é alterado"""
+        if self._is_scheduled_export():
+            self._arm_scheduled_export()
+
+    def _on_export_timer(self):
+        """Disparo do timer de exportação (periódico ou agendado)"""
+        self.auto_export_xlsx()
+        if self._is_scheduled_export():
+            # O timer pode disparar um pouco antes de HH:MM:00: marca o dia para não repetir hoje
+            self.last_scheduled_export_date = datetime.now().date()
+            # Próxima exportação: amanhã no mesmo horário
+            self._arm_scheduled_export()
+
     def _write_table_to_csv(self, table, filepath):
         """
-        CORRIGIDO: Método privado para escrever tabela em CSV (evita duplicação de código)
-        Agora com proteção contra crashes por permissões/antivírus
+        Método privado para escrever tabela em CSV (evita duplicação de código)
+        Escrita atômica: grava em arquivo temporário ".part" na mesma pasta e
+        substitui o destino com os.replace (sem janela de arquivo parcial).
 
         Args:
             table: QTableWidget a ser exportada
             filepath: Caminho do arquivo CSV de destino
 
         Raises:
-            Exception: Se falhar após todas as tentativas de retry
+            Exception: Se o destino estiver bloqueado (ex.: aberto no Excel)
         """
-        import time
-
-        max_retries = 3
-        retry_delay = 0.5  # segundos
-
-        for attempt in range(max_retries):
-            try:
-                # Tentar escrever o arquivo
-                with open(filepath, 'w', newline='', encoding='utf-8-sig') as csvfile:
-                    writer = csv.writer(csvfile, delimiter=';')
-
-                    # Escrever cabeçalhos
-                    headers = []
-                    for col in range(table.columnCount()):
-                        header_item = table.horizontalHeaderItem(col)
-                        headers.append(header_item.text() if header_item else f"Coluna {col}")
-                    writer.writerow(headers)
-
-                    # Escrever dados
-                    for row in range(table.rowCount()):
-                        row_data = []
-                        for col in range(table.columnCount()):
-                            item = table.item(row, col)
-                            row_data.append(item.text() if item else '')
-                        writer.writerow(row_data)
-
-                # Se chegou aqui, sucesso!
-                return
+        tmp_path = filepath + ".part"
 
-            except PermissionError as e:
-                if attempt < max_retries - 1:
-                    print(f"[AVISO] Arquivo em uso ou sem permissão (tentativa {attempt+1}/{max_retries}): {filepath}")
-                    print(f"  Aguardando {retry_delay}s antes de tentar novamente...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Backoff exponencial
-                else:
-                    # Última tentativa falhou
-                    raise Exception(
-                        f"Não foi possível salvar o arquivo após {max_retries} tentativas.\n\n"
-                        f"Possíveis causas:\n"
-                        f"- Arquivo está aberto em outro programa (Excel, etc.)\n"
-                        f"- Sem permissão de escrita na pasta\n"
-                        f"- Antivírus bloqueando a operação\n\n"
-                        f"Feche o arquivo se estiver aberto e tente novamente."
-                    ) from e
-
-            except Exception as e:
-                # Outro tipo de erro
-                import traceback
-                print(f"[ERRO] Falha ao exportar CSV:")
-                print(f"  Arquivo: {filepath}")
-                print(f"  Erro: {type(e).__name__}: {str(e)}")
-                print(f"  Detalhes:\n{traceback.format_exc()}")
-                raise
-
-    def check_scheduled_export(self):
-        """
-        Verifica se chegou o horário configurado para exportação diária.
-        Executa apenas uma vez por dia no horário especificado.
-        """
-        now = datetime.now()
-        current_time = now.time()
-        current_date = now.date()
-
-        # Obter horário configurado
-        scheduled_time = self.export_time_edit.time().toPyTime()
-
-        # DEBUG: Sempre mostra verificação (comentar depois se quiser)
-        print(f"[DEBUG] Verificando exportação agendada - Atual: {current_time.strftime('%H:%M:%S')}, "
-              f"Agendado: {scheduled_time.strftime('%H:%M')}, "
-              f"Última exportação: {self.last_scheduled_export_date}")
-
-        # Calcular horários em minutos desde meia-noite
-        current_minutes = current_time.hour * 60 + current_time.minute
-        scheduled_minutes = scheduled_time.hour * 60 + scheduled_time.minute
-
-        # CORRIGIDO: Verifica se já passou do horário agendado E ainda não exportou hoje
-        # Permite uma janela de 2 minutos para garantir que não perca o horário
-        time_to_export = (current_minutes >= scheduled_minutes and
-                         current_minutes <= scheduled_minutes + 2)
+        try:
+            n_cols = table.columnCount()
+
+            def _cell(row, col):
+                item = table.item(row, col)
+                return item.text() if item else ''
+
+            # Buffer de 1 MB reduz syscalls em tabelas grandes
+            with open(tmp_path, 'w', newline='', encoding='utf-8-sig', buffering=1 << 20) as csvfile:
+                writer = csv.writer(csvfile, delimiter=';')
+
+                # Escrever cabeçalhos
+                headers = []
+                for col in range(n_cols):
+                    header_item = table.horizontalHeaderItem(col)
+                    headers.append(header_item.text() if header_item else f"Coluna {col}")
+                writer.writerow(headers)
+
+                # Escrever dados (writerows consome o gerador sem materializar todas as linhas)
+                writer.writerows(
+                    tuple(_cell(row, col) for col in range(n_cols))
+                    for row in range(table.rowCount())
+                )
+
+            os.replace(tmp_path, filepath)
+
+        except PermissionError as e:
+            # Falha imediata (sem retry bloqueando a UI)
+            self._discard_partial(tmp_path)
+            raise Exception(
+                f"Não foi possível salvar o arquivo:\n{filepath}\n\n"
+                f"Possíveis causas:\n"
+                f"- Arquivo está aberto em outro programa (Excel, etc.)\n"
+                f"- Sem permissão de escrita na pasta\n"
+                f"- Antivírus bloqueando a operação\n\n"
+                f"Feche o arquivo se estiver aberto e tente novamente."
+            ) from e
 
-        if time_to_export and self.last_scheduled_export_date != current_date:
-            print(f"[INFO] Horário de exportação atingido: {scheduled_time.strftime('%H:%M')}")
-            self.auto_export_xlsx()
-            self.last_scheduled_export_date = current_date  # Marca como exportado hoje
-            print(f"[INFO] Próxima exportação: amanhã às {scheduled_time.strftime('%H:%M')}")
+        except Exception as e:
+            # Outro tipo de erro
+            import traceback
+            self._discard_partial(tmp_path)
+            print(f"[ERRO] Falha ao exportar CSV:")
+            print(f"  Arquivo: {filepath}")
+            print(f"  Erro: {type(e).__name__}: {str(e)}")
+            print(f"  Detalhes:\n{traceback.format_exc()}")
+            raise
+
+    @staticmethod
+    def _discard_partial(tmp_path):
+        """Remove arquivo temporário de uma escrita interrompida"""
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except OSError:
+            pass
 
     def auto_export_xlsx(self):
-        """Exporta Excel automaticamente para a pasta padrão (usada pelo timer)."""
+        """Exporta Excel automaticamente para a pasta padrão, em segundo plano (usada pelo timer)."""
+        if not HAS_XLSX:
+            print("[ERRO] Exportação automática indisponível: instale 'xlsxwriter' (pip install xlsxwriter)")
+            return
+
         try:
+            # Nada a exportar: evita montar resumo e gravar um arquivo vazio
+            if self.table.rowCount() == 0:
+                print("[INFO] Exportação automática ignorada: não há dados na tabela")
+                return
+
             export_folder = self.config.get('export_folder', '')
-            if not export_folder or not os.path.isdir(export_folder):
+            if not self._is_export_folder_valid(export_folder):
                 export_folder = str(Path("exports"))
                 Path(export_folder).mkdir(exist_ok=True)
 
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            now = datetime.now()
+            timestamp = now.strftime("%Y%m%d_%H%M%S")
+            now_str = now.strftime("%d/%m/%Y %H:%M:%S")
             filename = os.path.join(export_folder, f"relatorio_veiculos_{timestamp}.xlsx")
 
-            import pandas as pd
-
-            def _col_sum(col_idx):
-                total = 0
-                for row in range(self.table.rowCount()):
-                    item = self.table.item(row, col_idx)
-                    try:
-                        total += int(item.text()) if item else 0
-                    except ValueError:
-                        pass
-                return total
-
-            t_total     = _col_sum(2)
-            t_carros    = _col_sum(3)
-            t_motos     = _col_sum(4)
-            t_caminhoes = _col_sum(5)
-            t_onibus    = _col_sum(6)
+            # Totais já calculados pelo banco no último refresh_summary
+            totals      = self._last_totals
+            t_total     = totals['total']
+            t_carros    = totals['carros']
+            t_motos     = totals['motos']
+            t_caminhoes = totals['caminhoes']
+            t_onibus    = totals['onibus']
 
             n_cols = 7
             empty  = [""] * n_cols
+            pad1   = [""] * (n_cols - 1)
+            pad2   = [""] * (n_cols - 2)
 
             summary = [
-                ["RELATÓRIO DE CONTAGEM VEICULAR (AUTO)"] + [""] * (n_cols - 1),
-                ["Gerado em", datetime.now().strftime("%d/%m/%Y %H:%M:%S")] + [""] * (n_cols - 2),
+                ["RELATÓRIO DE CONTAGEM VEICULAR (AUTO)"] + pad1,
+                ["Gerado em", now_str] + pad2,
                 empty,
-                ["RESUMO"] + [""] * (n_cols - 1),
-                ["Total Geral", t_total]     + [""] * (n_cols - 2),
-                ["Carros",      t_carros]    + [""] * (n_cols - 2),
-                ["Motos",       t_motos]     + [""] * (n_cols - 2),
-                ["Caminhões",   t_caminhoes] + [""] * (n_cols - 2),
-                ["Ônibus",      t_onibus]    + [""] * (n_cols - 2),
+                ["RESUMO"] + pad1,
+                ["Total Geral", t_total]     + pad2,
+                ["Carros",      t_carros]    + pad2,
+                ["Motos",       t_motos]     + pad2,
+                ["Caminhões",   t_caminhoes] + pad2,
+                ["Ônibus",      t_onibus]    + pad2,
                 empty,
             ]
 
-            headers   = [["Data", "Hora", "Total", "Carros", "Motos", "Caminhões", "Ônibus"]]
-            data_rows = [
-                [(self.table.item(row, col).text() if self.table.item(row, col) else '')
-                 for col in range(self.table.columnCount())]
-                for row in range(self.table.rowCount())
-            ]
-            total_row = [["TOTAL", "", t_total, t_carros, t_motos, t_caminhoes, t_onibus]]
-
-            df = pd.DataFrame(summary + headers + data_rows + total_row)
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Relatório', index=False, header=False)
-                ws = writer.sheets['Relatório']
-                for col, width in zip(['A','B','C','D','E','F','G'],
-                                      [20, 14, 12, 12, 12, 14, 12]):
-                    ws.column_dimensions[col].width = width
+            headers   = ["Data", "Hora", "Total", "Carros", "Motos", "Caminhões", "Ônibus"]
+            data_rows = self._rows_in_view_order()
+            total_row = ["TOTAL", "", t_total, t_carros, t_motos, t_caminhoes, t_onibus]
 
-            print(f"[AUTO-EXPORT] Exportado: {filename}")
+            rows = itertools.chain(summary, [headers], data_rows, [total_row])
+            # Sem diálogos: o resultado vai só para o console
+            self._start_export_worker(filename, lambda path: write_xlsx(path, rows, _SUMMARY_WIDTHS),
+                                      success_msg=None)
 
         except Exception as e:
             import traceback
             print(f"[ERRO] Falha na exportação automática: {e}")
             traceback.print_exc()
 
+    def _rows_in_view_order(self):
+        """Linhas do cache na ordem exibida na tabela (respeita a ordenação feita pelo usuário)"""
+        cache = self._row_cache
+        table = self.table
+        return [cache[table.item(r, 0).data(Qt.UserRole)] for r in range(table.rowCount())]
+
     def create_metric_card(self, title, value, color):
         """Cria um card de métrica"""
         card = QFrame()
@@ -642,28 +707,38 @@ class HistoryTab(QWidget):
         """)
         value_label.setObjectName("metric_value")
         card_layout.addWidget(value_label)
+        card.value_label = value_label  # Referência direta (evita findChild a cada refresh)
 
         card_layout.addStretch()
 
         return card
 
+    def _recompute_date_strs(self, *_):
+        """Atualiza cache das strings de período usadas na consulta (dia inteiro)"""
+        self._start_str = self.start_date.date().toPyDate().strftime("%Y-%m-%d 00:00:00")
+        self._end_str = self.end_date.date().toPyDate().strftime("%Y-%m-%d 23:59:59")
+
     def refresh_current_view(self):
-        """Atualiza o resumo horário"""
+        """Atualiza o resumo horário (chamado pelo debounce)"""
         self.refresh_summary()
 
+    def _request_refresh(self):
+        """Agenda atualização com debounce de 150 ms (apenas a última solicitação executa)"""
+        self._debounce.start(150)
+
     def refresh_summary(self):
         """Atualiza visualização de resumo horário"""
         try:
             # Obter filtros - dia inteiro (00:00:00 até 23:59:59)
-            start = self.start_date.dateTime().toString("yyyy-MM-dd") + " 00:00:00"
-            end = self.end_date.dateTime().toString("yyyy-MM-dd") + " 23:59:59"
+            start = self._start_str
+            end = self._end_str
             rtsp_filter = self.rtsp_filter_combo.currentData()
 
-            print(f"[DEBUG] Buscando resumo horário:")
-            print(f"  RTSP URL: {rtsp_filter if rtsp_filter else '(TODAS AS FONTES)'}")
+            # Roda a cada refresh periódico: debug via logging (sem escrita no console por padrão)
+            logging.debug("Buscando resumo horário (RTSP URL: %s)", rtsp_filter or '(TODAS AS FONTES)')
 
-            # Buscar dados agregados
-            summary_data = self.database.get_hourly_summary(
+            # Buscar dados agregados + totais das colunas (uma ida ao banco)
+            summary_data, self._last_totals = self.database.get_hourly_summary_with_totals(
                 rtsp_url=rtsp_filter,
                 start_date=start,
                 end_date=end
@@ -673,31 +748,43 @@ class HistoryTab(QWidget):
             metrics = self.database.get_24h_metrics(rtsp_url=rtsp_filter)
 
             # Atualizar cards de métricas
-            self.card_total_24h.findChild(QLabel, "metric_value").setText(str(metrics['total_24h']))
-            self.card_media.findChild(QLabel, "metric_value").setText(str(metrics['media_hora']))
-            self.card_pico.findChild(QLabel, "metric_value").setText(str(metrics['pico_trafego']))
+            self._lbl_total_24h.setText(str(metrics['total_24h']))
+            self._lbl_media.setText(str(metrics['media_hora']))
+            self._lbl_pico.setText(str(metrics['pico_trafego']))
 
             # Limpar tabela de resumo
             self.table.setRowCount(0)
 
-            # Preencher tabela de resumo
+            # Preencher tabela de resumo (e cache de linhas para exportação).
+            # Ordenação suspensa durante o preenchimento: senão a linha muda de lugar
+            # a cada setItem na coluna ordenada; ao reativar, a tabela reordena uma vez
+            self.table.setSortingEnabled(False)
+            row_cache = []
             for item in summary_data:
                 row = self.table.rowCount()
                 self.table.insertRow(row)
 
-                self.table.setItem(row, 0, QTableWidgetItem(item['data']))
-                self.table.setItem(row, 1, QTableWidgetItem(f"{item['hora']:02d}:00"))
+                hora_str = _HOUR_STRS[item['hora']]
+                data_item = QTableWidgetItem(item['data'])
+                data_item.setData(Qt.UserRole, len(row_cache))  # Posição da linha no cache
+                self.table.setItem(row, 0, data_item)
+                self.table.setItem(row, 1, QTableWidgetItem(hora_str))
                 self.table.setItem(row, 2, QTableWidgetItem(str(item['total'])))
                 self.table.setItem(row, 3, QTableWidgetItem(str(item['carros'])))
                 self.table.setItem(row, 4, QTableWidgetItem(str(item['motos'])))
                 self.table.setItem(row, 5, QTableWidgetItem(str(item['caminhoes'])))
                 self.table.setItem(row, 6, QTableWidgetItem(str(item['onibus'])))
 
+                row_cache.append([item['data'], hora_str, item['total'], item['carros'],
+                                  item['motos'], item['caminhoes'], item['onibus']])
+            self._row_cache = row_cache
+            self.table.setSortingEnabled(True)
+
             # Atualizar status
             fonte_nome = self.rtsp_filter_combo.currentText().replace("", "")
             self.info_label.setText(f" {len(summary_data)} intervalos horários • Fonte: {fonte_nome}")
 
-            print(f"[DEBUG] Resumo carregado: {len(summary_data)} intervalos")
+            logging.debug("Resumo carregado: %d intervalos", len(summary_data))
 
         except Exception as e:
             print(f"[ERRO] Falha ao atualizar resumo: {e}")
@@ -710,108 +797,154 @@ class HistoryTab(QWidget):
             QMessageBox.warning(self, "Aviso", "Não há dados para exportar.")
             return
 
+        if not HAS_XLSX:
+            QMessageBox.critical(self, "Erro", MISSING_XLSX_MSG)
+            return
+
         export_folder = self.config.get('export_folder', '')
         file_prefix = "resumo_horario"
         default_filename = f"{file_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
 
-        if export_folder and os.path.isdir(export_folder):
+        if self._is_export_folder_valid(export_folder):
             default_filename = os.path.join(export_folder, default_filename)
             reply = QMessageBox.question(
                 self, "Exportar",
                 f"Exportar para a pasta padrão?\n\n{export_folder}",
                 QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
             )
-            if reply == QMessageBox.No:
-                filename, _ = QFileDialog.getSaveFileName(
-                    self, "Exportar Histórico", default_filename, "Excel (*.xlsx)")
-                if not filename:
-                    return
-            else:
-                filename = default_filename
-        else:
-            filename, _ = QFileDialog.getSaveFileName(
-                self, "Exportar Histórico", default_filename, "Excel (*.xlsx)")
-            if not filename:
+            if reply == QMessageBox.Yes:
+                self._on_filename_chosen(default_filename)
                 return
 
+        # Diálogo não-bloqueante: o restante da exportação segue em _on_filename_chosen
+        self._ask_save_filename("Exportar Histórico", default_filename, "Excel (*.xlsx)",
+                                self._on_filename_chosen)
+
+    def _is_export_folder_valid(self, export_folder):
+        """Verifica (com cache por sessão) se a pasta de exportação configurada existe"""
+        if not export_folder:
+            return False
+        cached = self._export_folder_valid
+        if cached is None or cached[0] != export_folder:
+            cached = (export_folder, os.path.isdir(export_folder))
+            self._export_folder_valid = cached
+        return cached[1]
+
+    def invalidate_export_folder_cache(self):
+        """Descarta a validação em cache (chamado quando a pasta de exportação muda)"""
+        self._export_folder_valid = None
+
+    def _ask_save_filename(self, title, default_filename, name_filter, callback):
+        """Abre o diálogo de salvar com open() (sem bloquear o event loop); resultado via callback"""
+        dialog = QFileDialog(self, title)
+        dialog.setAcceptMode(QFileDialog.AcceptSave)
+        dialog.setNameFilter(name_filter)
+        dialog.setDefaultSuffix('xlsx')
+        folder, name = os.path.split(default_filename)
+        if folder:
+            dialog.setDirectory(folder)
+        dialog.selectFile(name)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.fileSelected.connect(callback)
+        dialog.open()
+
+    def _on_filename_chosen(self, filename):
+        """Monta o resumo horário e grava no arquivo escolhido"""
+        if not filename:
+            return
+
         if not filename.endswith('.xlsx'):
             filename += '.xlsx'
 
         try:
-            import pandas as pd
-
-            # Calcular totais das colunas numéricas
-            def _col_sum(col_idx):
-                total = 0
-                for row in range(self.table.rowCount()):
-                    item = self.table.item(row, col_idx)
-                    try:
-                        total += int(item.text()) if item else 0
-                    except ValueError:
-                        pass
-                return total
-
-            t_total     = _col_sum(2)
-            t_carros    = _col_sum(3)
-            t_motos     = _col_sum(4)
-            t_caminhoes = _col_sum(5)
-            t_onibus    = _col_sum(6)
+            # Totais já calculados pelo banco no último refresh_summary
+            totals      = self._last_totals
+            t_total     = totals['total']
+            t_carros    = totals['carros']
+            t_motos     = totals['motos']
+            t_caminhoes = totals['caminhoes']
+            t_onibus    = totals['onibus']
 
             start_str = self.start_date.date().toString("dd/MM/yyyy")
             end_str   = self.end_date.date().toString("dd/MM/yyyy")
             fonte     = self.rtsp_filter_combo.currentText()
 
-            n_cols = 7
-            empty  = [""] * n_cols
+            n_cols  = 7
+            empty   = [""] * n_cols
+            pad1    = [""] * (n_cols - 1)
+            pad2    = [""] * (n_cols - 2)
+            now_str = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
 
             summary = [
-                ["RELATÓRIO DE CONTAGEM VEICULAR"] + [""] * (n_cols - 1),
-                ["Período", f"{start_str} a {end_str}"] + [""] * (n_cols - 2),
-                ["Fonte",   fonte]                      + [""] * (n_cols - 2),
-                ["Gerado em", datetime.now().strftime("%d/%m/%Y %H:%M:%S")] + [""] * (n_cols - 2),
+                ["RELATÓRIO DE CONTAGEM VEICULAR"] + pad1,
+                ["Período", f"{start_str} a {end_str}"] + pad2,
+                ["Fonte",   fonte]                      + pad2,
+                ["Gerado em", now_str] + pad2,
                 empty,
-                ["RESUMO"] + [""] * (n_cols - 1),
-                ["Total Geral",  t_total]     + [""] * (n_cols - 2),
-                ["Carros",       t_carros]    + [""] * (n_cols - 2),
-                ["Motos",        t_motos]     + [""] * (n_cols - 2),
-                ["Caminhões",    t_caminhoes] + [""] * (n_cols - 2),
-                ["Ônibus",       t_onibus]    + [""] * (n_cols - 2),
+                ["RESUMO"] + pad1,
+                ["Total Geral",  t_total]     + pad2,
+                ["Carros",       t_carros]    + pad2,
+                ["Motos",        t_motos]     + pad2,
+                ["Caminhões",    t_caminhoes] + pad2,
+                ["Ônibus",       t_onibus]    + pad2,
                 empty,
-                ["DETALHAMENTO HORÁRIO"] + [""] * (n_cols - 1),
+                ["DETALHAMENTO HORÁRIO"] + pad1,
             ]
 
             headers = ["Data", "Hora", "Total", "Carros", "Motos", "Caminhões", "Ônibus"]
-            data_rows = []
-            for row in range(self.table.rowCount()):
-                data_rows.append([
-                    (self.table.item(row, col).text() if self.table.item(row, col) else '')
-                    for col in range(self.table.columnCount())
-                ])
+            data_rows = self._rows_in_view_order()
 
             # Linha de total ao final
             total_row = ["TOTAL", "", t_total, t_carros, t_motos, t_caminhoes, t_onibus]
 
-            final = summary + [headers] + data_rows + [total_row]
-            df = pd.DataFrame(final)
-
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Relatório', index=False, header=False)
-                ws = writer.sheets['Relatório']
-                for col, width in zip(['A','B','C','D','E','F','G'],
-                                      [20, 14, 12, 12, 12, 14, 12]):
-                    ws.column_dimensions[col].width = width
-
-            QMessageBox.information(self, "Sucesso",
-                                    f"Histórico exportado com sucesso!\n\n{filename}")
+            rows = itertools.chain(summary, [headers], data_rows, [total_row])
+            self._start_export_worker(
+                filename,
+                lambda path: write_xlsx(path, rows, _SUMMARY_WIDTHS),
+                "Histórico exportado com sucesso!"
+            )
 
-        except ImportError:
-            QMessageBox.critical(self, "Erro",
-                "Instale 'openpyxl':\npip install openpyxl")
         except Exception as e:
             import traceback; traceback.print_exc()
             QMessageBox.critical(self, "Erro ao Exportar",
                                  f"Não foi possível exportar o arquivo:\n\n{str(e)}")
 
+    def _start_export_worker(self, filename, write_func, success_msg):
+        """
+        Executa a gravação do arquivo em um ExportWorker e avisa o usuário ao terminar.
+        Com success_msg=None (exportação automática) o resultado só é registrado no console.
+        """
+        worker = ExportWorker(filename, write_func)
+        if success_msg is None:
+            worker.export_done.connect(lambda path: print(f"[AUTO-EXPORT] Exportado: {path}"))
+            worker.error_occurred.connect(
+                lambda msg: print(f"[ERRO] Falha na exportação automática: {msg}"))
+        else:
+            worker.export_done.connect(
+                lambda path: QMessageBox.information(self, "Sucesso", f"{success_msg}\n\n{path}"))
+            worker.error_occurred.connect(
+                lambda msg: QMessageBox.critical(self, "Erro ao Exportar", msg))
+        worker.finished.connect(lambda: self._cleanup_export_worker(worker))
+        self._export_workers.append(worker)
+        worker.start()
+        print(f"[INFO] Exportação iniciada em segundo plano: {filename}")
+
+    def _cleanup_export_worker(self, worker):
+        """Limpeza após término do worker de exportação"""
+        if worker in self._export_workers:
+            self._export_workers.remove(worker)
+        if not self._closing:
+            # Encerrando: o worker pode estar sendo aguardado em wait_export_workers (outra thread)
+            worker.deleteLater()
+
+    def wait_export_workers(self, msecs=5000):
+        """
+        Aguarda as exportações em andamento terminarem. Pode ser chamado fora da UI
+        thread depois de stop_timers (a partir daí os workers não são destruídos).
+        """
+        for worker in list(self._export_workers):
+            worker.wait(msecs)
+
     def open_custom_export_dialog(self):
         """Abre diálogo para exportação personalizada"""
         dialog = CustomExportDialog(self)
@@ -822,65 +955,58 @@ class HistoryTab(QWidget):
 
     def export_custom_report(self, date, time):
         """Gera e salva relatório personalizado"""
+        if not HAS_XLSX:
+            QMessageBox.critical(self, "Erro", MISSING_XLSX_MSG)
+            return
+
         try:
-            import pandas as pd
-            # Formatar datas para query
-            date_str = date.toString("yyyy-MM-dd")
-            time_str = time.toString("HH:mm:ss")
-            
-            start_dt = f"{date_str} 00:00:00"
-            end_dt = f"{date_str} {time_str}"
+            # Formatar data/hora uma única vez (query, exibição e nome do arquivo)
+            d_iso = date.toString("yyyy-MM-dd")
+            d_br = date.toString("dd/MM/yyyy")
+            d_file = date.toString("dd-MM-yyyy")
+            t_iso = time.toString("HH:mm:ss")
+            t_br = time.toString("HH:mm")
+            t_file = time.toString("HH-mm")
+
+            start_dt = d_iso + " 00:00:00"
+            end_dt = d_iso + " " + t_iso
             
             print(f"[INFO] Gerando relatório personalizado: {start_dt} até {end_dt}")
             
-            # Buscar dados
-            # Usamos get_hourly_summary para pegar os dados discriminados por hora
-            data = self.database.get_hourly_summary(
+            # Buscar dados discriminados por hora + totais (agregados no SQLite, uma ida ao banco)
+            data, totals = self.database.get_hourly_summary_with_totals(
                 rtsp_url=self.current_rtsp_url, # Respeita filtro atual de câmera se houver
                 start_date=start_dt,
                 end_date=end_dt,
-                limit=1000
+                limit=1000,
+                as_tuples=True
             )
             
             if not data:
                 QMessageBox.warning(self, "Aviso", "Nenhum dado encontrado para o período selecionado.")
                 return
 
-            # Calcular totais
-            total_geral = sum(item['total'] for item in data)
-            total_carros = sum(item['carros'] for item in data)
-            total_motos = sum(item['motos'] for item in data)
-            total_caminhoes = sum(item['caminhoes'] for item in data)
-            total_onibus = sum(item['onibus'] for item in data)
+            total_geral = totals['total']
+            total_carros = totals['carros']
+            total_motos = totals['motos']
+            total_caminhoes = totals['caminhoes']
+            total_onibus = totals['onibus']
             
             # Preparar Excel
-            default_filename = f"relatorio_personalizado_{date.toString('dd-MM-yyyy')}_ate_{time.toString('HH-mm')}.xlsx"
+            default_filename = "relatorio_personalizado_" + d_file + "_ate_" + t_file + ".xlsx"
             
             # Configurar pasta padrão se existir
             export_folder = self.config.get('export_folder', '')
-            if export_folder and os.path.exists(export_folder):
+            if self._is_export_folder_valid(export_folder):
                  default_filename = os.path.join(export_folder, default_filename)
-            
-            filename, _ = QFileDialog.getSaveFileName(
-                self,
-                "Salvar Relatório Personalizado",
-                default_filename,
-                "Excel Files (*.xlsx)"
-            )
-            
-            if not filename:
-                return
-                
-            if not filename.endswith('.xlsx'):
-                filename += '.xlsx'
 
-            # Criar DataFrame único para o relatório
-            
+            # Montar as linhas do relatório (uma única aba)
+
             # 1. Metadados (Cabeçalho)
             header_data = [
                 ['RELATÓRIO DE CONTAGEM VEICULAR', ''],
-                ['Data Relatório', date.toString("dd/MM/yyyy")],
-                ['Horário Limite', time.toString("HH:mm")],
+                ['Data Relatório', d_br],
+                ['Horário Limite', t_br],
                 ['Fonte', self.current_rtsp_url if self.current_rtsp_url else "Todas as Fontes"],
                 ['Gerado em', datetime.now().strftime("%d/%m/%Y %H:%M:%S")],
                 ['', ''] # Linha em branco
@@ -902,42 +1028,26 @@ class HistoryTab(QWidget):
             detail_header = [['DETALHAMENTO HORÁRIO', '', '', '', '', '']]
             detail_cols = [['Hora', 'Total', 'Carros', 'Motos', 'Caminhões', 'Ônibus']]
             
-            detail_rows = []
-            for item in data:
-                detail_rows.append([
-                    f"{item['hora']:02d}:00",
-                    item['total'],
-                    item['carros'],
-                    item['motos'],
-                    item['caminhoes'],
-                    item['onibus']
-                ])
+            # Linhas do cursor: (data, hora, total, carros, motos, caminhoes, onibus)
+            detail_rows = [(_HOUR_STRS[h], t, c, m, k, o) for _d, h, t, c, m, k, o in data]
                 
-            # Combinar tudo em um único DataFrame (usando listas)
-            # Estratégia: Criar um DataFrame genérico e preencher
-            final_data = []
-            final_data.extend(header_data)
-            final_data.extend(summary_data)
-            final_data.extend(detail_header)
-            final_data.extend(detail_cols)
-            final_data.extend(detail_rows)
-            
-            df_final = pd.DataFrame(final_data)
+            # Combinar tudo em sequência, sem lista intermediária
+            rows = itertools.chain(header_data, summary_data, detail_header, detail_cols, detail_rows)
 
-            # Escrever no Excel em uma única aba
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                df_final.to_excel(writer, sheet_name='Relatório', index=False, header=False)
-                
-                # Ajustar largura das colunas (opcional, requer acesso à planilha)
-                worksheet = writer.sheets['Relatório']
-                worksheet.column_dimensions['A'].width = 20
-                worksheet.column_dimensions['B'].width = 15
-                worksheet.column_dimensions['C'].width = 15
-                worksheet.column_dimensions['D'].width = 15
-                worksheet.column_dimensions['E'].width = 15
-                worksheet.column_dimensions['F'].width = 15
-                    
-            QMessageBox.information(self, "Sucesso", f"Relatório Excel exportado com sucesso!\n{filename}")
+            # Escrever no Excel em uma única aba (em segundo plano)
+            def _write(path):
+                write_xlsx(path, rows, (20, 15, 15, 15, 15, 15))
+
+            def _on_custom_filename_chosen(filename):
+                if not filename:
+                    return
+                if not filename.endswith('.xlsx'):
+                    filename += '.xlsx'
+                self._start_export_worker(filename, _write, "Relatório Excel exportado com sucesso!")
+
+            # Diálogo não-bloqueante: a gravação começa quando o arquivo for escolhido
+            self._ask_save_filename("Salvar Relatório Personalizado", default_filename,
+                                    "Excel Files (*.xlsx)", _on_custom_filename_chosen)
             
         except Exception as e:
             import traceback
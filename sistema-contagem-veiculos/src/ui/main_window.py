@@ -6,9 +6,13 @@ Interface gráfica principal do sistema
 
 import sys
 import cv2
+import numpy as np
 import os
+import re
 import threading
-from datetime import datetime
+import functools
+import html
+from datetime import datetime, timedelta
 from pathlib import Path
 
 from PyQt5.QtWidgets import (
@@ -18,27 +22,202 @@ from PyQt5.QtWidgets import (
     QSizePolicy, QFileDialog, QTabWidget, QTimeEdit, QSplitter, QRadioButton,
     QButtonGroup, QStackedWidget
 )
-from PyQt5.QtCore import Qt, QEvent, QTimer, pyqtSignal, QSize, QTime
-from PyQt5.QtGui import QImage, QPixmap, QKeySequence, QPainter, QPen, QColor, QIcon
+from PyQt5.QtCore import (
+    Qt, QEvent, QTimer, pyqtSignal, pyqtSlot, QSize, QTime, QSignalBlocker,
+    QCoreApplication, QMetaObject, QObject, QRunnable, QThreadPool
+)
+from PyQt5.QtGui import QImage, QPixmap, QKeySequence, QIcon
 
 from ..core.config import Config
 from ..core.detector import VideoThread
-from ..core.counter import VehicleCounter
+from ..core.counter import CATEGORIAS, snapshot_from_dict
 from ..core.database import CounterDatabase
-from .history_tab import HistoryTab
-from .dashboard_tab import DashboardTab
-from .queue_tab import QueueTab
-from .queue_reports_tab import QueueReportsTab
-from .queue_analysis_tab import QueueAnalysisTab
 from .components.navigation_hub import NavigationMenu
 from .view_wrapper import wrap_with_header
 from .styles import Styles, ThemeColors
 from .model_dialog import PersonalizedModelDialog
 
 
+# Raiz do projeto e pasta de ícones, calculadas uma vez na importação
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+ICONS_DIR = PROJECT_ROOT / 'icons'
+
+# Caches de ícones: cada ícone é lido/decodificado uma vez por processo
+_QICON_CACHE = {}   # nome -> QIcon (ou None se o arquivo não existir)
+_ICON_CACHE = {}    # (nome, tamanho, tamanho de origem) -> QPixmap
+
+
+def _get_icon(icon_name):
+    """Retorna o QIcon de icons/<nome>.ico (cacheado) ou None se não existir"""
+    if icon_name not in _QICON_CACHE:
+        icon_path = ICONS_DIR / f'{icon_name}.ico'
+        # QIcon carrega a melhor resolução do .ico (QPixmap(path) pega só a primeira imagem)
+        _QICON_CACHE[icon_name] = QIcon(str(icon_path)) if icon_path.exists() else None
+    return _QICON_CACHE[icon_name]
+
+
+def _get_icon_pixmap(icon_name, size, from_size=None):
+    """
+    Retorna o QPixmap do ícone, cacheado, ou None se não existir.
+
+    Sem from_size devolve o pixmap size x size. Com from_size, extrai o
+    pixmap from_size x from_size (resolução alta do .ico) e o reduz com
+    SmoothTransformation para a altura size; só o resultado fica no cache.
+    """
+    key = (icon_name, size, from_size)
+    pixmap = _ICON_CACHE.get(key)
+    if pixmap is None:
+        icon = _get_icon(icon_name)
+        if icon is None:
+            return None
+        if from_size is None:
+            pixmap = icon.pixmap(size, size)
+        else:
+            pixmap = icon.pixmap(from_size, from_size)
+            if not pixmap.isNull():
+                pixmap = pixmap.scaledToHeight(size, Qt.SmoothTransformation)
+        _ICON_CACHE[key] = pixmap
+    return pixmap
+
+
+# Fonte de vídeo: índice de webcam ou rtsp/http://[usuario[:senha]@]host[:porta][/caminho]
+# Uma única passada sobre a URL; os grupos alimentam as mensagens de validate_rtsp_url
+_STREAM_URL_RE = re.compile(
+    r'(?P<webcam>\d+)$'
+    r'|(?P<scheme>rtsp|http)://'
+    r'(?:(?P<user>[^:@/]*)(?::(?P<password>[^/]*))?@)?'
+    r'(?P<host>[^/:@?#]*)'
+)
+
+# Preview do ROI: dimensões e cores RGBA usadas no buffer NumPy
+_ROI_PREVIEW_W, _ROI_PREVIEW_H = 320, 180
+_ROI_RGBA_CROPPED = (0x0a, 0x16, 0x28, 0xff)   # Área cortada (#0a1628)
+_ROI_RGBA_ACTIVE = (0x3B, 0x82, 0xF6, 0xff)    # Área ativa (#3B82F6)
+_ROI_RGBA_BORDER = (0xEF, 0x44, 0x44, 0xff)    # Linhas de corte (#EF4444)
+_ROI_RGBA_DISABLED = (0x10, 0xB9, 0x81, 0xff)  # ROI desativado (#10B981)
+
+
+def _render_roi_buffer(buf, top, bottom, left, right):
+    """
+    Desenha a geometria do ROI direto no buffer RGBA (H x W x 4) com
+    preenchimentos por fatia do NumPy, em vez de várias chamadas ao QPainter.
+
+    Returns:
+        tuple: (active_top, active_bottom, active_left, active_right) em pixels
+    """
+    h, w = buf.shape[:2]
+    active_top = int(h * top / 100)
+    active_bottom = int(h * (100 - bottom) / 100)
+    active_left = int(w * left / 100)
+    active_right = int(w * (100 - right) / 100)
+
+    # Tudo fora da área ativa é área cortada; a área ativa é pintada por cima
+    buf[:] = _ROI_RGBA_CROPPED
+    buf[active_top:active_bottom, active_left:active_right] = _ROI_RGBA_ACTIVE
+
+    # Linhas de corte com 2 px (equivalente ao QPen de largura 2)
+    if top > 0:
+        buf[max(active_top - 1, 0):active_top + 1, :] = _ROI_RGBA_BORDER
+    if bottom > 0:
+        buf[max(active_bottom - 1, 0):active_bottom + 1, :] = _ROI_RGBA_BORDER
+    if left > 0:
+        buf[:, max(active_left - 1, 0):active_left + 1] = _ROI_RGBA_BORDER
+    if right > 0:
+        buf[:, max(active_right - 1, 0):active_right + 1] = _ROI_RGBA_BORDER
+
+    return active_top, active_bottom, active_left, active_right
+
+
+def _counter_report_rows(snapshot):
+    """Linhas do relatório de contagem (a partir de um CounterSnapshot): cabeçalho, categorias e TOTAL"""
+    rows = [('Categoria', 'Ida', 'Volta', 'Total')]
+    for cat, (ida, volta) in zip(CATEGORIAS, snapshot.cats):
+        rows.append((cat, ida, volta, ida + volta))
+    rows.append(('TOTAL', snapshot.total_ida, snapshot.total_volta, snapshot.total))
+    return rows
+
+
+def _write_counter_report(filename, rows):
+    """
+    Grava o relatório .xlsx direto das linhas (sem pandas), com a largura de cada
+    coluna calculada pelo maior texto (+2, máx. 50). Os backends .xlsx são
+    importados só aqui, para não pesar na abertura da janela.
+    """
+    from ..core.xlsx_export import HAS_XLSX, MISSING_XLSX_MSG, atomic_write, write_xlsx
+    if not HAS_XLSX:
+        raise ImportError(MISSING_XLSX_MSG)
+    widths = [min(max(len(str(row[i])) for row in rows) + 2, 50) for i in range(len(rows[0]))]
+    atomic_write(filename, lambda path: write_xlsx(path, rows, widths))
+
+
+# Esperas entre tentativas quando o .xlsx está bloqueado (Excel aberto/antivírus); 3 tentativas ao todo
+_EXPORT_RETRY_DELAYS_MS = (500, 1000)
+
+
+class _ExportSignals(QObject):
+    """Sinais do _ExportRunnable (QRunnable não é QObject e não pode emitir sinais)"""
+    finished = pyqtSignal(str, bool)  # Mensagem para o log, sucesso
+
+
+class _ExportRunnable(QRunnable):
+    """
+    Grava o relatório automático no QThreadPool. Recebe as linhas já montadas na
+    thread da GUI: aqui só há I/O, sem acesso a QObjects nem ao banco.
+    Agora com proteção robusta contra crashes por permissões/antivírus.
+    """
+
+    def __init__(self, export_folder, rows):
+        super().__init__()
+        self.export_folder = export_folder
+        self.rows = rows
+        self.signals = _ExportSignals()
+
+    def run(self):
+        import time
+
+        try:
+            # Gerar nome do arquivo com timestamp
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = os.path.join(self.export_folder, f"relatorio_{timestamp}.xlsx")
+
+            # Tentar exportar com retry (proteção contra antivírus/permissões)
+            max_retries = len(_EXPORT_RETRY_DELAYS_MS) + 1
+
+            for attempt in range(max_retries):
+                try:
+                    # Operação de I/O que pode demorar (arquivo .part + os.replace)
+                    _write_counter_report(filename, self.rows)
+
+                    # Sucesso!
+                    self.signals.finished.emit(f"Relatório exportado: {filename}", True)
+                    return
+
+                except PermissionError as perm_error:
+                    if attempt < max_retries - 1:
+                        print(f"[AVISO] Arquivo Excel bloqueado (tentativa {attempt+1}/{max_retries})")
+                        # Bloquear aqui é aceitável: roda numa thread do QThreadPool, sem event loop
+                        time.sleep(_EXPORT_RETRY_DELAYS_MS[attempt] / 1000)
+                    else:
+                        raise Exception(
+                            f"Arquivo bloqueado após {max_retries} tentativas.\n"
+                            f"Feche o Excel se estiver com o arquivo aberto."
+                        ) from perm_error
+
+        except Exception as e:
+            # Log detalhado para diagnóstico
+            import traceback
+            print(f"[ERRO] Falha na exportação Excel:")
+            print(f"  Tipo: {type(e).__name__}")
+            print(f"  Mensagem: {str(e)}")
+            print(f"  Detalhes:\n{traceback.format_exc()}")
+
+            # Sinal entregue na thread da GUI (mensagem amigável)
+            self.signals.finished.emit(f"Erro na exportação: {type(e).__name__}", False)
+
+
 class MainWindow(QMainWindow):
-    # Sinal para comunicação thread-safe com a GUI
-    export_completed = pyqtSignal(str)  # Recebe mensagem de log
+    # Texto do indicador de status (cor por status, sem seletor de propriedade no QSS)
+    _STATUS_HTML = '<span style="color: {color};">● {status}</span>'
 
     def __init__(self):
         super().__init__()
@@ -46,13 +225,66 @@ class MainWindow(QMainWindow):
         self.database = CounterDatabase()  # Banco de dados para persistir contagens
         self.video_thread = None
         self._export_in_progress = False  # Flag para evitar múltiplas exportações simultâneas
+        # (pasta, link, contadores) da última exportação automática gravada: sem mudança, não regrava
+        self._last_export_signature = None
+        self._pending_export_signature = None
         self.is_fullscreen = False
         self.current_rtsp_url = ''  # Link RTSP atualmente em uso
         self.selected_model = 'yolo11n.pt'  # Modelo padrão
         
-        # 🔒 PROTEÇÃO CONTRA RACE CONDITIONS - Flags de shutdown
+        # 🔒 PROTEÇÃO CONTRA RACE CONDITIONS - Flag de shutdown
+        # Invariante: só a thread da GUI escreve (closeEvent); outras threads apenas leem.
+        # A leitura/escrita de um bool é atômica sob o GIL, então não há lock.
         self._is_closing = False  # Flag para indicar que estamos fechando
-        self._shutdown_lock = threading.Lock()  # Lock para sincronização thread-safe
+
+        # Preview do ROI: repintura coalescida (um redesenho após o usuário parar o slider)
+        self._roi_preview_timer = QTimer(self)
+        self._roi_preview_timer.setSingleShot(True)
+        self._roi_preview_timer.setInterval(40)
+        self._roi_preview_timer.timeout.connect(self._do_update_roi_preview)
+        self._roi_buf = np.empty((_ROI_PREVIEW_H, _ROI_PREVIEW_W, 4), np.uint8)
+        self._roi_preview_state = None  # Último (enabled, top, bottom, left, right) desenhado
+        self._roi_preview_dirty = False  # Alteração pendente enquanto o painel esquerdo está oculto
+        self._last_scale_size = (0, 0)  # Tamanho da área de vídeo no frame anterior
+        self._pending_counters = None  # Contadores recebidos com a Visão Geral oculta
+        self._last_counter_texts = {}  # id(label) -> último texto aplicado em update_counters
+
+        # Exibição do vídeo limitada a ~60 Hz: só o frame mais recente é desenhado
+        self._pending_image = None
+        self._paint_timer = QTimer(self)
+        self._paint_timer.setSingleShot(True)
+        self._paint_timer.setInterval(16)
+        self._paint_timer.timeout.connect(self._flush_video)
+        self._last_frame_pixmap = None  # Último frame recebido, sem reescala (base do resize)
+
+        # Redimensionamento da janela: escala rápida durante o arraste, suave ao final
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(120)
+        self._resize_timer.timeout.connect(self._final_rescale)
+
+        # Gravação do config.json coalescida: vários toggles seguidos = uma escrita em disco
+        self._config_save_timer = QTimer(self)
+        self._config_save_timer.setSingleShot(True)
+        self._config_save_timer.setInterval(500)
+        self._config_save_timer.timeout.connect(self.config.save)
+
+        # Log: mensagens seguidas são acumuladas e escritas juntas na próxima volta do event loop
+        self._log_queue = []
+        self._log_flush_timer = QTimer(self)
+        self._log_flush_timer.setSingleShot(True)
+        self._log_flush_timer.setInterval(0)
+        self._log_flush_timer.timeout.connect(self._flush_log)
+
+        # VideoThreads paradas: mantém referências até o cleanup em background terminar
+        self._dying_threads = set()
+
+        # Último estado aplicado por _update_left_panel_visibility (None = ainda não aplicado)
+        self._left_panel_visible = None
+
+        # Diálogos construídos no primeiro uso e reaproveitados (evita refazer widgets/QSS)
+        self._reset_dialog = None
+        self._personalized_dialog = None
         
         self.init_ui()
         self.apply_stylesheet()
@@ -62,29 +294,22 @@ class MainWindow(QMainWindow):
         self.export_timer = QTimer()
         self.export_timer.timeout.connect(self.auto_export_report)
 
-        # Timer para verificação de horário específico (verifica a cada minuto)
+        # Timer single-shot para horário específico: armado com o tempo até o próximo disparo
         self.export_schedule_timer = QTimer()
-        self.export_schedule_timer.timeout.connect(self.check_scheduled_export)
-        self.export_schedule_timer.setInterval(60000)  # 60 segundos
+        self.export_schedule_timer.setSingleShot(True)
+        self.export_schedule_timer.timeout.connect(self._on_scheduled_export)
 
         # Controle de última exportação agendada
         self.last_scheduled_export_date = None
 
-        # Conectar sinal de exportação completa ao log
-        self.export_completed.connect(self.add_log)
-
         # NÃO carregar contadores ao abrir - só depois de inserir link RTSP
 
     def create_icon_label(self, icon_name, size=24):
         """Cria um QLabel com ícone PNG da pasta icons/"""
-        icon_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'icons', f'{icon_name}.ico')
+        pixmap = _get_icon_pixmap(icon_name, size)
 
         label = QLabel()
-        if os.path.exists(icon_path):
-            # USAR QIcon PARA CARREGAR MELHOR RESOLUÇÃO DO ARQUIVO .ICO
-            # QPixmap(path) carrega apenas a primeira imagem (geralmente pequena), causando borrões
-            icon = QIcon(icon_path)
-            pixmap = icon.pixmap(size, size)
+        if pixmap is not None:
             label.setPixmap(pixmap)
         else:
             # Fallback para texto se ícone não existir
@@ -129,10 +354,19 @@ class MainWindow(QMainWindow):
         # 1. Estiver na aba Principal (Monitoramento, index 0)
         # 2. Estiver na página "Visão Geral" (index 1 do Stack)
         should_show = (main_tab_index == 0) and (monitor_stack_index == 1)
+
+        # Mesmo estado da última chamada: evita sizes()/setSizes() e o relayout do splitter
+        if should_show == self._left_panel_visible:
+            return
+        # Antes da janela aparecer isVisible() é sempre False; só memoriza com a janela visível
+        self._left_panel_visible = should_show if self.isVisible() else None
         
         if should_show:
             if not self.left_scroll.isVisible():
                 self.left_scroll.show()
+                # Preview de ROI alterado enquanto o painel estava oculto
+                if self._roi_preview_dirty:
+                    self._do_update_roi_preview()
                 # Tentar restaurar tamanho anterior ou usar padrão
                 sizes = getattr(self, '_saved_splitter_sizes', None)
                 if sizes and sizes[0] > 50:
@@ -144,8 +378,14 @@ class MainWindow(QMainWindow):
                 self._saved_splitter_sizes = self.main_splitter.sizes()
                 self.left_scroll.hide()
 
+    @pyqtSlot(int)
     def _on_main_tab_changed(self, index):
-        """Handler para mudança de aba principal."""
+        """Handler para mudança de aba principal (e de página do monitor_stack)."""
+        # Menu do hub de fila só é montado quando a aba "Tempo de Fila" aparece pela primeira vez
+        queue_stack = getattr(self, 'queue_stack', None)
+        if queue_stack is not None and self.main_tab_widget.currentWidget() is queue_stack \
+                and (id(queue_stack), 0) in self._lazy_pages:
+            self._show_stack_page(queue_stack, 0)
         self._update_left_panel_visibility()
 
     def init_ui(self):
@@ -154,9 +394,9 @@ class MainWindow(QMainWindow):
         self.setMinimumSize(1400, 800)
 
         # Definir ícone da janela
-        icon_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'icons', 'app.ico')
-        if os.path.exists(icon_path):
-            self.setWindowIcon(QIcon(icon_path))
+        app_icon = _get_icon('app')
+        if app_icon is not None:
+            self.setWindowIcon(app_icon)
 
         central = QWidget()
         self.setCentralWidget(central)
@@ -219,20 +459,13 @@ class MainWindow(QMainWindow):
         header_layout.setSpacing(15)
 
         # 1. Logo (Esquerda)
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        logo_path = os.path.join(project_root, 'icons', 'logo.ico')
+        # Extrai a versão 512x512 (alta resolução) e reduz para 72 px de altura; o resultado fica em cache
+        logo_pixmap = _get_icon_pixmap('logo', 72, from_size=512)
 
-        if os.path.exists(logo_path):
+        if logo_pixmap is not None:
             logo_label = QLabel()
-            # USAR QIcon PARA CARREGAR MELHOR RESOLUÇÃO DO ARQUIVO .ICO
-            # QPixmap(path) carrega apenas a primeira imagem (geralmente pequena), causando borrões
-            icon = QIcon(logo_path)
-            # Solicitar um pixmap grande (ex: 512x512) para garantir que o Qt pegue a versão de alta resolução
-            logo_pixmap = icon.pixmap(512, 512)
             
-            # Redimensionar logo para um tamanho menor e fixo para caber no header horizontal
             if not logo_pixmap.isNull():
-                logo_pixmap = logo_pixmap.scaledToHeight(72, Qt.SmoothTransformation)
                 logo_label.setPixmap(logo_pixmap)
                 logo_label.setAlignment(Qt.AlignCenter)
                 header_layout.addWidget(logo_label)
@@ -241,7 +474,7 @@ class MainWindow(QMainWindow):
         separator = QFrame()
         separator.setFrameShape(QFrame.VLine)
         separator.setFrameShadow(QFrame.Sunken)
-        separator.setStyleSheet(f"background-color: {ThemeColors.BORDER}; width: 1px;")
+        separator.setObjectName("panelSeparator")
         separator.setFixedHeight(62)
         header_layout.addWidget(separator)
 
@@ -253,12 +486,10 @@ class MainWindow(QMainWindow):
         
         title = QLabel("Sistema Monitoramento")
         title.setObjectName("panelTitle")
-        title.setStyleSheet(f"font-size: 21px; font-weight: bold; color: {ThemeColors.TEXT_PRIMARY};")
         title.setAlignment(Qt.AlignLeft | Qt.AlignBottom)
         
         subtitle = QLabel("Detecção e Análise em Tempo Real")
         subtitle.setObjectName("panelSubtitle")
-        subtitle.setStyleSheet(f"font-size: 15px; color: {ThemeColors.TEXT_SECONDARY};")
         subtitle.setAlignment(Qt.AlignLeft | Qt.AlignTop)
         
         text_layout.addWidget(title)
@@ -291,31 +522,25 @@ class MainWindow(QMainWindow):
         ])
         self.modelo_combo.currentIndexChanged.connect(self._on_model_selection_changed)
 
-        # Forçar estilo escuro no dropdown (remove fundo branco)
-        self.modelo_combo.view().setStyleSheet(Styles.COMBO_BOX_VIEW)
-
         # Define modelo atual
         modelo_atual = self.config.get('modelo_yolo', 'yolo11n.pt')
         
         # Bloquear sinais durante inicialização para evitar popup de diálogo
-        self.modelo_combo.blockSignals(True)
-        
-        # Determinar índice e label baseado no modelo salvo
-        if 'yolo11n' in modelo_atual:
-            self.modelo_combo.setCurrentIndex(0)
-            self.modelo_label = QLabel("yolo11n.pt")
-            self.selected_model = 'yolo11n.pt'
-        else:
-            # Modelo personalizado
-            self.modelo_combo.setCurrentIndex(1)
-            # Exibir caminho do modelo personalizado
-            display_name = os.path.basename(modelo_atual) if os.path.isabs(modelo_atual) else modelo_atual
-            self.modelo_label = QLabel(display_name)
-            self.selected_model = modelo_atual
-            
-        self.modelo_combo.blockSignals(False)
+        with QSignalBlocker(self.modelo_combo):
+            # Determinar índice e label baseado no modelo salvo
+            if 'yolo11n' in modelo_atual:
+                self.modelo_combo.setCurrentIndex(0)
+                self.modelo_label = QLabel("yolo11n.pt")
+                self.selected_model = 'yolo11n.pt'
+            else:
+                # Modelo personalizado
+                self.modelo_combo.setCurrentIndex(1)
+                # Exibir caminho do modelo personalizado
+                display_name = os.path.basename(modelo_atual) if os.path.isabs(modelo_atual) else modelo_atual
+                self.modelo_label = QLabel(display_name)
+                self.selected_model = modelo_atual
         
-        self.modelo_label.setStyleSheet("color: #888888; font-style: italic;")
+        self.modelo_label.setObjectName("modelLabel")
         
         model_layout.addWidget(self.modelo_combo)
         model_layout.addWidget(self.modelo_label)
@@ -356,76 +581,39 @@ class MainWindow(QMainWindow):
         roi_controls_layout.setSpacing(8)
         roi_controls_layout.setContentsMargins(15, 5, 0, 5)
 
-        # Topo
-        top_row = QHBoxLayout()
-        top_row.addWidget(QLabel("Cortar topo:"))
-        self.roi_top_label = QLabel(f"{self.config.get('roi_crop',{}).get('top_percent', 0)}%")
-        top_row.addWidget(self.roi_top_label)
-        top_row.addStretch()
-        roi_controls_layout.addLayout(top_row)
-
-        self.roi_top_slider = QSlider(Qt.Horizontal)
-        self.roi_top_slider.setRange(0, 50)
-        self.roi_top_slider.setValue(int(self.config.get('roi_crop',{}).get('top_percent', 0)))
-        self.roi_top_slider.valueChanged.connect(lambda v: (self.roi_top_label.setText(f"{v}%"), self.update_roi_preview()))
-        roi_controls_layout.addWidget(self.roi_top_slider)
-
-        # Base
-        bottom_row = QHBoxLayout()
-        bottom_row.addWidget(QLabel("Cortar base:"))
-        self.roi_bot_label = QLabel(f"{self.config.get('roi_crop',{}).get('bottom_percent', 0)}%")
-        bottom_row.addWidget(self.roi_bot_label)
-        bottom_row.addStretch()
-        roi_controls_layout.addLayout(bottom_row)
-
-        self.roi_bot_slider = QSlider(Qt.Horizontal)
-        self.roi_bot_slider.setRange(0, 50)
-        self.roi_bot_slider.setValue(int(self.config.get('roi_crop',{}).get('bottom_percent', 0)))
-        self.roi_bot_slider.valueChanged.connect(lambda v: (self.roi_bot_label.setText(f"{v}%"), self.update_roi_preview()))
-        roi_controls_layout.addWidget(self.roi_bot_slider)
-
-        # Esquerda
-        left_row = QHBoxLayout()
-        left_row.addWidget(QLabel("Cortar esquerda:"))
-        self.roi_left_label = QLabel(f"{self.config.get('roi_crop',{}).get('left_percent', 0)}%")
-        left_row.addWidget(self.roi_left_label)
-        left_row.addStretch()
-        roi_controls_layout.addLayout(left_row)
-
-        self.roi_left_slider = QSlider(Qt.Horizontal)
-        self.roi_left_slider.setRange(0, 50)
-        self.roi_left_slider.setValue(int(self.config.get('roi_crop',{}).get('left_percent', 0)))
-        self.roi_left_slider.valueChanged.connect(lambda v: (self.roi_left_label.setText(f"{v}%"), self.update_roi_preview()))
-        roi_controls_layout.addWidget(self.roi_left_slider)
-
-        # Direita
-        right_row = QHBoxLayout()
-        right_row.addWidget(QLabel("Cortar direita:"))
-        self.roi_right_label = QLabel(f"{self.config.get('roi_crop',{}).get('right_percent', 0)}%")
-        right_row.addWidget(self.roi_right_label)
-        right_row.addStretch()
-        roi_controls_layout.addLayout(right_row)
-
-        self.roi_right_slider = QSlider(Qt.Horizontal)
-        self.roi_right_slider.setRange(0, 50)
-        self.roi_right_slider.setValue(int(self.config.get('roi_crop',{}).get('right_percent', 0)))
-        self.roi_right_slider.valueChanged.connect(lambda v: (self.roi_right_label.setText(f"{v}%"), self.update_roi_preview()))
-        roi_controls_layout.addWidget(self.roi_right_slider)
+        # Sliders de corte (topo, base, esquerda, direita)
+        roi_crop = self.config.get('roi_crop', {})
+        self.roi_top_slider, self.roi_top_label = self._mk_roi_row(
+            roi_controls_layout, roi_crop, 'top_percent', "Cortar topo:")
+        self.roi_bot_slider, self.roi_bot_label = self._mk_roi_row(
+            roi_controls_layout, roi_crop, 'bottom_percent', "Cortar base:")
+        self.roi_left_slider, self.roi_left_label = self._mk_roi_row(
+            roi_controls_layout, roi_crop, 'left_percent', "Cortar esquerda:")
+        self.roi_right_slider, self.roi_right_label = self._mk_roi_row(
+            roi_controls_layout, roi_crop, 'right_percent', "Cortar direita:")
 
         # Preview ROI
         self.roi_preview = QLabel()
         self.roi_preview.setFixedHeight(100)
         self.roi_preview.setAlignment(Qt.AlignCenter)
         self.roi_preview.setStyleSheet(Styles.ROI_PREVIEW)
+        # Texto do preview em QLabel sobreposto: a repintura não precisa de QPainter
+        roi_overlay = QVBoxLayout(self.roi_preview)
+        roi_overlay.setContentsMargins(0, 0, 0, 0)
+        self.roi_preview_text = QLabel()
+        self.roi_preview_text.setAlignment(Qt.AlignCenter)
+        self.roi_preview_text.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.roi_preview_text.setStyleSheet(Styles.ROI_PREVIEW_TEXT)
+        roi_overlay.addWidget(self.roi_preview_text)
         roi_controls_layout.addWidget(self.roi_preview)
-        self.update_roi_preview()
+        self._do_update_roi_preview()  # Primeiro desenho imediato (sem debounce)
 
         roi_controls.setLayout(roi_controls_layout)
         perf_layout.addWidget(roi_controls)
 
         help_label2 = QLabel("↑ Remove bordas desnecessárias para focar na via")
         help_label2.setWordWrap(True)
-        help_label2.setStyleSheet(f"color: {ThemeColors.TEXT_TERTIARY}; font-size: 11px; font-style: italic;")
+        help_label2.setObjectName("helpLabel")
         perf_layout.addWidget(help_label2)
 
         perf_group.setLayout(perf_layout)
@@ -438,17 +626,17 @@ class MainWindow(QMainWindow):
 
         self.cb_hide_labels = QCheckBox("Ocultar rótulos (ID e classe)")
         self.cb_hide_labels.setChecked(not bool(self.config.get('show_labels', False)))
-        self.cb_hide_labels.toggled.connect(lambda v: self.config.set('show_labels', not v))
+        self.cb_hide_labels.toggled.connect(lambda v: self._set_config_deferred('show_labels', not v))
         visual_layout.addWidget(self.cb_hide_labels)
 
         self.cb_hide_lines = QCheckBox("Ocultar linha de contagem")
         self.cb_hide_lines.setChecked(bool(self.config.get('hide_detection_lines', False)))
-        self.cb_hide_lines.toggled.connect(lambda v: self.config.set('hide_detection_lines', v))
+        self.cb_hide_lines.toggled.connect(lambda v: self._set_config_deferred('hide_detection_lines', v))
         visual_layout.addWidget(self.cb_hide_lines)
 
         self.cb_hide_boxes = QCheckBox("Ocultar caixas de detecção")
         self.cb_hide_boxes.setChecked(bool(self.config.get('hide_detection_boxes', False)))
-        self.cb_hide_boxes.toggled.connect(lambda v: self.config.set('hide_detection_boxes', v))
+        self.cb_hide_boxes.toggled.connect(lambda v: self._set_config_deferred('hide_detection_boxes', v))
         visual_layout.addWidget(self.cb_hide_boxes)
 
         visual_group.setLayout(visual_layout)
@@ -472,30 +660,12 @@ class MainWindow(QMainWindow):
         self.btn_select_folder.setMaximumWidth(50)
         self.btn_select_folder.setToolTip("Selecionar pasta")
         # Adicionar ícone PNG ao botão
-        icon_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'icons', 'pasta.ico')
-        if os.path.exists(icon_path):
-            self.btn_select_folder.setIcon(QIcon(icon_path))
+        folder_icon = _get_icon('pasta')
+        if folder_icon is not None:
+            self.btn_select_folder.setIcon(folder_icon)
             self.btn_select_folder.setIconSize(QSize(26, 26))
-        # Estilo mais escuro harmonizando com a UI
-        self.btn_select_folder.setStyleSheet(f"""
-            QPushButton {{
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 {ThemeColors.SURFACE_LIGHT}, stop:1 {ThemeColors.SURFACE});
-                border: 2px solid {ThemeColors.PRIMARY};
-                border-radius: 8px;
-                padding: 4px;
-            }}
-            QPushButton:hover {{
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #3d5a7f, stop:1 {ThemeColors.SURFACE_LIGHT});
-                border: 2px solid {ThemeColors.PRIMARY_HOVER};
-            }}
-            QPushButton:pressed {{
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 {ThemeColors.SURFACE}, stop:1 #1a2f4f);
-                border: 2px solid {ThemeColors.PRIMARY_PRESSED};
-            }}
-        """)
+        # Estilo mais escuro harmonizando com a UI (#folderButton em apply_stylesheet)
+        self.btn_select_folder.setObjectName("folderButton")
         self.btn_select_folder.clicked.connect(self.select_export_folder)
         folder_row.addWidget(self.btn_select_folder)
 
@@ -503,7 +673,7 @@ class MainWindow(QMainWindow):
 
         help_label3 = QLabel("↑ Relatórios serão salvos nesta pasta automaticamente")
         help_label3.setWordWrap(True)
-        help_label3.setStyleSheet(f"color: {ThemeColors.TEXT_TERTIARY}; font-size: 11px; font-style: italic;")
+        help_label3.setObjectName("helpLabel")
         export_layout.addWidget(help_label3)
 
         export_layout.addSpacing(10)
@@ -515,7 +685,6 @@ class MainWindow(QMainWindow):
         self.auto_export_combo.addItems(["Desativado", "5 min", "10 min", "30 min", "60 min", "Horário Específico"])
         self.auto_export_combo.setMaximumWidth(170)
         self.auto_export_combo.currentIndexChanged.connect(self.update_auto_export)
-        self.auto_export_combo.view().setStyleSheet(Styles.COMBO_BOX_VIEW)
         auto_export_row.addWidget(self.auto_export_combo)
 
         # Seletor de horário (inicialmente oculto)
@@ -529,6 +698,7 @@ class MainWindow(QMainWindow):
         self.export_time_edit.setMaximumWidth(80)
         self.export_time_edit.setToolTip("Horário diário para exportação automática de relatório")
         self.export_time_edit.setVisible(False)  # Oculto por padrão
+        self.export_time_edit.timeChanged.connect(self._on_export_time_changed)
         auto_export_row.addWidget(self.export_time_edit)
 
         auto_export_row.addStretch()
@@ -555,23 +725,8 @@ class MainWindow(QMainWindow):
         self.btn_reset.setMinimumHeight(40)
         self.btn_reset.setCursor(Qt.PointingHandCursor)
         self.btn_reset.clicked.connect(self.reset_counters)
-        # Estilo vermelho para indicar ação destrutiva
-        self.btn_reset.setStyleSheet("""
-            QPushButton {
-                background-color: #DC3545;
-                color: white;
-                border: none;
-                border-radius: 6px;
-                font-weight: bold;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #C82333;
-            }
-            QPushButton:pressed {
-                background-color: #BD2130;
-            }
-        """)
+        # Estilo vermelho para indicar ação destrutiva (#resetButton em apply_stylesheet)
+        self.btn_reset.setObjectName("resetButton")
         buttons_row1.addWidget(self.btn_reset)
 
         self.btn_export = QPushButton("Exportar")
@@ -598,24 +753,22 @@ class MainWindow(QMainWindow):
         layout.addSpacing(10)
         log_header = QHBoxLayout()
         log_label = QLabel("Log do Sistema")
-        log_label.setStyleSheet(f"font-weight: bold; color: {ThemeColors.TEXT_SECONDARY};")
+        log_label.setObjectName("logLabel")
         log_header.addWidget(log_label)
         log_header.addSpacing(8)
         self.btn_toggle_log = QPushButton("▲ Ocultar")
         self.btn_toggle_log.setFixedWidth(100)
         self.btn_toggle_log.setFixedHeight(28)
         self.btn_toggle_log.setCursor(Qt.PointingHandCursor)
-        self.btn_toggle_log.setStyleSheet(
-            f"QPushButton {{ background: transparent; color: {ThemeColors.TEXT_SECONDARY}; "
-            f"border: 1px solid {ThemeColors.TEXT_SECONDARY}; border-radius: 4px; font-size: 11px; padding: 0px 6px; }}"
-            f"QPushButton:hover {{ color: {ThemeColors.PRIMARY}; border-color: {ThemeColors.PRIMARY}; }}"
-        )
+        self.btn_toggle_log.setObjectName("logToggleButton")
         self.btn_toggle_log.clicked.connect(self._toggle_log)
         log_header.addWidget(self.btn_toggle_log)
         log_header.addStretch()
         layout.addLayout(log_header)
 
         self.log_text = QTextEdit()
+        # Limita o log às últimas 500 linhas (o Qt descarta as mais antigas)
+        self.log_text.document().setMaximumBlockCount(500)
         self.log_text.setReadOnly(True)
         self.log_text.setMaximumHeight(180)
         self.log_text.setMinimumHeight(120)
@@ -624,8 +777,12 @@ class MainWindow(QMainWindow):
         # Status
         layout.addSpacing(10)
         status_layout = QHBoxLayout()
-        self.status_label = QLabel("● Offline")
-        self.status_label.setObjectName("statusOffline")
+        self.status_label = QLabel()
+        self.status_label.setObjectName("statusLabel")
+        # Cor definida no próprio texto (rich text): trocar o status não repole o estilo
+        self.status_label.setTextFormat(Qt.RichText)
+        self.status_label.setText(self._STATUS_HTML.format(color=ThemeColors.DANGER, status="Offline"))
+        self._last_status = None  # Último status aplicado em update_status
         status_layout.addWidget(self.status_label)
         status_layout.addStretch()
         layout.addLayout(status_layout)
@@ -633,57 +790,84 @@ class MainWindow(QMainWindow):
         layout.addStretch()
         return panel
 
+    def _mk_roi_row(self, parent_layout, roi_crop, key, text):
+        """Cria a linha (rótulo + valor) e o slider de um corte de ROI; retorna (slider, valor_label)"""
+        value = int(roi_crop.get(key, 0))
+
+        row = QHBoxLayout()
+        row.addWidget(QLabel(text))
+        value_label = QLabel(f"{value}%")
+        row.addWidget(value_label)
+        row.addStretch()
+        parent_layout.addLayout(row)
+
+        slider = QSlider(Qt.Horizontal)
+        slider.setRange(0, 50)
+        slider.setValue(value)
+        slider.valueChanged.connect(functools.partial(self._on_roi_changed, value_label))
+        parent_layout.addWidget(slider)
+        return slider, value_label
+
+    def _set_config_deferred(self, key, value):
+        """Altera a config em memória e agenda uma única gravação em disco (500 ms)"""
+        self.config.set(key, value, save=False)
+        self._config_save_timer.start()
+
+    def _flush_config(self):
+        """Grava imediatamente uma alteração de config ainda pendente"""
+        if self._config_save_timer.isActive():
+            self._config_save_timer.stop()
+            self.config.save()
+
+    def _on_roi_changed(self, label, value):
+        """Slot único dos sliders de ROI: atualiza o rótulo do slider e agenda o preview"""
+        label.setText(f"{value}%")
+        self._roi_preview_timer.start()
+
     def update_roi_preview(self):
+        """Agenda atualização do preview do ROI (debounce de 40 ms)"""
+        self._roi_preview_timer.start()
+
+    def _do_update_roi_preview(self):
         """Atualiza preview do ROI"""
+        # Painel oculto: ninguém vê o preview; repinta quando o painel voltar
+        left_scroll = getattr(self, 'left_scroll', None)
+        if left_scroll is not None and left_scroll.isHidden():
+            self._roi_preview_dirty = True
+            return
+        self._roi_preview_dirty = False
+
         enabled = self.cb_roi.isChecked()
         top = self.roi_top_slider.value()
         bottom = self.roi_bot_slider.value()
         left = self.roi_left_slider.value()
         right = self.roi_right_slider.value()
+
+        # Nada mudou desde a última repintura: mantém o pixmap atual
+        state = (enabled, top, bottom, left, right)
+        if state == self._roi_preview_state:
+            return
+        self._roi_preview_state = state
         
-        preview_img = QPixmap(320, 180)
-        preview_img.fill(QColor("#1e3a5f"))
-        
-        painter = QPainter(preview_img)
-        
-        if enabled and (top > 0 or bottom > 0 or left > 0 or right > 0):
-            painter.fillRect(0, 0, 320, int(180 * top / 100), QColor("#0a1628"))
-            painter.fillRect(0, int(180 * (100 - bottom) / 100), 320, 180, QColor("#0a1628"))
-            painter.fillRect(0, 0, int(320 * left / 100), 180, QColor("#0a1628"))
-            painter.fillRect(int(320 * (100 - right) / 100), 0, 320, 180, QColor("#0a1628"))
-            
-            active_top = int(180 * top / 100)
-            active_bottom = int(180 * (100 - bottom) / 100)
-            active_left = int(320 * left / 100)
-            active_right = int(320 * (100 - right) / 100)
-            
-            painter.fillRect(active_left, active_top, 
-                           active_right - active_left, 
-                           active_bottom - active_top, 
-                           QColor("#3B82F6"))
-            
-            pen = QPen(QColor("#EF4444"), 2)
-            painter.setPen(pen)
-            if top > 0:
-                painter.drawLine(0, active_top, 320, active_top)
-            if bottom > 0:
-                painter.drawLine(0, active_bottom, 320, active_bottom)
-            if left > 0:
-                painter.drawLine(active_left, 0, active_left, 180)
-            if right > 0:
-                painter.drawLine(active_right, 0, active_right, 180)
-            
-            painter.setPen(QColor("#FFFFFF"))
+        buf = self._roi_buf
+        roi_active = enabled and (top > 0 or bottom > 0 or left > 0 or right > 0)
+
+        # Geometria desenhada no buffer NumPy; o texto fica no QLabel sobreposto
+        if roi_active:
+            _render_roi_buffer(buf, top, bottom, left, right)
+        else:
+            buf[:] = _ROI_RGBA_DISABLED
+
+        qimg = QImage(buf.data, _ROI_PREVIEW_W, _ROI_PREVIEW_H,
+                      _ROI_PREVIEW_W * 4, QImage.Format_RGBA8888)
+        self.roi_preview.setPixmap(QPixmap.fromImage(qimg))
+
+        if roi_active:
             area_h = 100 - top - bottom
             area_w = 100 - left - right
-            painter.drawText(10, 95, f"Área ativa: {area_w}% × {area_h}%")
+            self.roi_preview_text.setText(f"Área ativa: {area_w}% × {area_h}%")
         else:
-            painter.fillRect(0, 0, 320, 180, QColor("#10B981"))
-            painter.setPen(QColor("#FFFFFF"))
-            painter.drawText(80, 95, "ROI Desativado - Frame completo")
-        
-        painter.end()
-        self.roi_preview.setPixmap(preview_img)
+            self.roi_preview_text.setText("ROI Desativado - Frame completo")
 
     def create_tabs_panel(self):
         """Cria o painel de abas principal com Navegação Hub & Spoke"""
@@ -701,14 +885,16 @@ class MainWindow(QMainWindow):
         # --- Página 0: Menu ---
         menu_items_mon = [
             ("Visão Geral", "Monitoramento ao vivo das câmeras e contadores.", "app", ThemeColors.PRIMARY, lambda: self.monitor_stack.setCurrentIndex(1)),
-            ("Análise", "Gráficos detalhados e estatísticas de fluxo.", "analise", ThemeColors.SECONDARY, lambda: self.monitor_stack.setCurrentIndex(2)),
-            ("Histórico", "Logs completos de veículos e eventos.", "historico", ThemeColors.ACCENT, lambda: self.monitor_stack.setCurrentIndex(3))
+            ("Análise", "Gráficos detalhados e estatísticas de fluxo.", "analise", ThemeColors.SECONDARY, lambda: self._show_stack_page(self.monitor_stack, 2)),
+            ("Histórico", "Logs completos de veículos e eventos.", "historico", ThemeColors.ACCENT, lambda: self._show_stack_page(self.monitor_stack, 3))
         ]
         self.monitor_menu = NavigationMenu(menu_items_mon)
         self.monitor_stack.addWidget(self.monitor_menu)
         
         # --- Página 1: Visão Geral (Wrapped) ---
         self.monitoring_view = self.create_monitoring_view_content()
+        # Contadores recebidos com a página oculta são aplicados no Show (ver eventFilter)
+        self.monitoring_view.installEventFilter(self)
         
         # Wrap in ScrollArea for splitter flexibility
         scroll = QScrollArea()
@@ -722,22 +908,16 @@ class MainWindow(QMainWindow):
             lambda: self.monitor_stack.setCurrentIndex(0)
         ))
         
-        # --- Página 2: Dashboard (Wrapped) ---
-        self.dashboard_tab = DashboardTab(self.database, self.config, self)
-        self.monitor_stack.addWidget(wrap_with_header(
-            self.dashboard_tab, "Análise", "Dashboard de Métricas", 
-            lambda: self.monitor_stack.setCurrentIndex(0)
-        ))
-        
-        # --- Página 3: Histórico (Wrapped) ---
-        self.history_tab = HistoryTab(self.database, self.config, self)
-        self.monitor_stack.addWidget(wrap_with_header(
-            self.history_tab, "Histórico", "Registro de Eventos", 
-            lambda: self.monitor_stack.setCurrentIndex(0)
-        ))
+        # --- Páginas 2 e 3: Dashboard e Histórico ---
+        # Construídas apenas na primeira visita (adiam imports de matplotlib/consultas ao banco)
+        self.dashboard_tab = None
+        self.history_tab = None
+        self._lazy_pages = {}
+        self._add_lazy_page(self.monitor_stack, self._build_dashboard_page)   # Página 2
+        self._add_lazy_page(self.monitor_stack, self._build_history_page)     # Página 3
         
         # Conectar mudança de página no monitoramento para controlar painel lateral
-        self.monitor_stack.currentChanged.connect(lambda i: self._update_left_panel_visibility())
+        self.monitor_stack.currentChanged.connect(self._on_main_tab_changed)
         
         self.main_tab_widget.addTab(self.monitor_stack, "Monitoramento")
 
@@ -746,45 +926,105 @@ class MainWindow(QMainWindow):
         # =========================================================================
         self.queue_stack = QStackedWidget()
         
-        # --- Página 0: Menu ---
+        # --- Página 0: Menu (montado ao abrir a aba pela primeira vez) ---
+        self.queue_menu = None
+        self._add_lazy_page(self.queue_stack, self._build_queue_menu)           # Página 0
+
+        # --- Páginas 1 a 3: Fila, Relatórios e Análise (construídas na primeira visita) ---
+        self.queue_tab = None
+        self.queue_reports = None
+        self.queue_analysis = None
+        self._add_lazy_page(self.queue_stack, self._build_queue_page)           # Página 1
+        self._add_lazy_page(self.queue_stack, self._build_queue_reports_page)   # Página 2
+        self._add_lazy_page(self.queue_stack, self._build_queue_analysis_page)  # Página 3
+        
+        self.main_tab_widget.addTab(self.queue_stack, "Tempo de Fila")
+
+        return self.main_tab_widget
+
+    def _add_lazy_page(self, stack, factory):
+        """Adiciona um placeholder ao stack; a página real é criada por factory() na primeira visita"""
+        placeholder = QWidget()
+        index = stack.addWidget(placeholder)
+        self._lazy_pages[(id(stack), index)] = factory
+
+    def _ensure_stack_page(self, stack, index):
+        """Constrói a página (se ainda for placeholder) antes de exibi-la"""
+        factory = self._lazy_pages.pop((id(stack), index), None)
+        if factory is None:
+            return
+        placeholder = stack.widget(index)
+        stack.insertWidget(index, factory())
+        stack.removeWidget(placeholder)
+        placeholder.deleteLater()
+
+    def _show_stack_page(self, stack, index, on_shown=None):
+        """Navega para uma página do hub, criando-a sob demanda"""
+        self._ensure_stack_page(stack, index)
+        if on_shown is not None:
+            on_shown()
+        stack.setCurrentIndex(index)
+
+    def _build_dashboard_page(self):
+        from .dashboard_tab import DashboardTab
+        self.dashboard_tab = DashboardTab(self.database, self.config, self)
+        if self.current_rtsp_url:
+            self.dashboard_tab.set_rtsp_url(self.current_rtsp_url)
+        return wrap_with_header(
+            self.dashboard_tab, "Análise", "Dashboard de Métricas", 
+            lambda: self.monitor_stack.setCurrentIndex(0)
+        )
+
+    def _build_history_page(self):
+        from .history_tab import HistoryTab
+        self.history_tab = HistoryTab(self.database, self.config, self)
+        if self.current_rtsp_url:
+            self.history_tab.set_rtsp_url(self.current_rtsp_url)
+        return wrap_with_header(
+            self.history_tab, "Histórico", "Registro de Eventos", 
+            lambda: self.monitor_stack.setCurrentIndex(0)
+        )
+
+    def _build_queue_menu(self):
         menu_items_queue = [
-            ("Monitoramento Fila", "Visualização da fila com timers e heatmaps.", "tempofila", ThemeColors.WARNING, lambda: self.queue_stack.setCurrentIndex(1)),
-            ("Relatórios", "Histórico de tempos de espera e exportação.", "relatoriofila", ThemeColors.SUCCESS, lambda: (self.queue_reports.refresh_data(), self.queue_stack.setCurrentIndex(2))),
-            ("Análise", "Gráficos de tendência e distribuição dos tempos de espera.", "analise", ThemeColors.SECONDARY, lambda: (self.queue_analysis.refresh_data(), self.queue_stack.setCurrentIndex(3))),
+            ("Monitoramento Fila", "Visualização da fila com timers e heatmaps.", "tempofila", ThemeColors.WARNING, lambda: self._show_stack_page(self.queue_stack, 1)),
+            ("Relatórios", "Histórico de tempos de espera e exportação.", "relatoriofila", ThemeColors.SUCCESS, lambda: self._show_stack_page(self.queue_stack, 2, lambda: self.queue_reports.refresh_data())),
+            ("Análise", "Gráficos de tendência e distribuição dos tempos de espera.", "analise", ThemeColors.SECONDARY, lambda: self._show_stack_page(self.queue_stack, 3, lambda: self.queue_analysis.refresh_data())),
         ]
         self.queue_menu = NavigationMenu(menu_items_queue)
-        self.queue_stack.addWidget(self.queue_menu)
+        return self.queue_menu
 
-        # --- Página 1: Queue Tab (Wrapped) ---
+    def _build_queue_page(self):
+        from .queue_tab import QueueTab
         self.queue_tab = QueueTab(self.config, self)
-        self.queue_stack.addWidget(wrap_with_header(
+        return wrap_with_header(
             self.queue_tab, "Tempo de Fila", "Monitoramento ao Vivo",
             lambda: self.queue_stack.setCurrentIndex(0)
-        ))
+        )
 
-        # --- Página 2: Relatórios (Wrapped) ---
+    def _build_queue_reports_page(self):
+        from .queue_reports_tab import QueueReportsTab
         self.queue_reports = QueueReportsTab(self, self)
-        self.queue_stack.addWidget(wrap_with_header(
+        return wrap_with_header(
             self.queue_reports, "Relatórios de Fila", "Histórico da Sessão",
             lambda: self.queue_stack.setCurrentIndex(0)
-        ))
+        )
 
-        # --- Página 3: Análise (Wrapped) ---
+    def _build_queue_analysis_page(self):
+        from .queue_analysis_tab import QueueAnalysisTab
         self.queue_analysis = QueueAnalysisTab(self, self)
-        self.queue_stack.addWidget(wrap_with_header(
+        return wrap_with_header(
             self.queue_analysis, "Análise de Fila", "Gráficos e Estatísticas",
             lambda: self.queue_stack.setCurrentIndex(0)
-        ))
-        
-        self.main_tab_widget.addTab(self.queue_stack, "Tempo de Fila")
-
-        return self.main_tab_widget
+        )
 
     def create_monitoring_view_content(self):
         """Cria o conteúdo da visão geral (antigo create_monitoring_tab sem o wrapper)"""
         panel = QFrame()
         panel.setObjectName("rightPanel")
         panel.setMinimumWidth(0) # Permitir encolher
+        # Um único stylesheet para os rótulos do painel (seletores por objectName)
+        panel.setStyleSheet(Styles.MONITORING_VIEW)
         layout = QVBoxLayout(panel)
         layout.setSpacing(12)
         layout.setContentsMargins(12, 12, 12, 12)
@@ -801,12 +1041,11 @@ class MainWindow(QMainWindow):
         total_layout = QVBoxLayout()
         total_layout.setSpacing(2)
         total_title = QLabel("Total")
-        total_title.setStyleSheet(f"color: {ThemeColors.TEXT_SECONDARY}; font-size: 12px; font-weight: 600;")
+        total_title.setObjectName("totalTitle")
         total_layout.addWidget(total_title)
 
         self.total_label = QLabel("0")
         self.total_label.setObjectName("totalCount")
-        self.total_label.setStyleSheet(f"color: {ThemeColors.TEXT_PRIMARY}; font-size: 42px; font-weight: 900;")
         total_layout.addWidget(self.total_label)
         hbox.addLayout(total_layout)
 
@@ -820,10 +1059,10 @@ class MainWindow(QMainWindow):
         ida_layout = QVBoxLayout()
         ida_layout.setSpacing(2)
         ida_title = QLabel("↑ Ida")
-        ida_title.setStyleSheet(f"color: {ThemeColors.SUCCESS}; font-size: 12px; font-weight: 600;")
+        ida_title.setObjectName("idaTitle")
         ida_layout.addWidget(ida_title)
         self.ida_total_label = QLabel("0")
-        self.ida_total_label.setStyleSheet(f"color: {ThemeColors.TEXT_PRIMARY}; font-size: 28px; font-weight: 700;")
+        self.ida_total_label.setObjectName("idaCount")
         ida_layout.addWidget(self.ida_total_label)
         dir_layout.addLayout(ida_layout)
 
@@ -831,10 +1070,10 @@ class MainWindow(QMainWindow):
         volta_layout = QVBoxLayout()
         volta_layout.setSpacing(2)
         volta_title = QLabel("↓ Volta")
-        volta_title.setStyleSheet(f"color: {ThemeColors.DANGER}; font-size: 12px; font-weight: 600;")
+        volta_title.setObjectName("voltaTitle")
         volta_layout.addWidget(volta_title)
         self.volta_total_label = QLabel("0")
-        self.volta_total_label.setStyleSheet(f"color: {ThemeColors.TEXT_PRIMARY}; font-size: 28px; font-weight: 700;")
+        self.volta_total_label.setObjectName("voltaCount")
         volta_layout.addWidget(self.volta_total_label)
         dir_layout.addLayout(volta_layout)
 
@@ -858,6 +1097,8 @@ class MainWindow(QMainWindow):
             card = self.create_category_card(cat, color, icon)
             self.category_cards[cat] = card
             grid.addWidget(card, 0, idx)
+        # Cards na ordem de CATEGORIAS: alinhados por índice com CounterSnapshot.cats
+        self._cards_ordered = tuple(self.category_cards[c] for c in CATEGORIAS)
         
         layout.addLayout(grid)
 
@@ -870,12 +1111,12 @@ class MainWindow(QMainWindow):
         camera_icon = self.create_icon_label('camera', size=18)
         title_container.addWidget(camera_icon)
         video_title = QLabel("Visualização da Câmera")
-        video_title.setStyleSheet(f"color: {ThemeColors.TEXT_SECONDARY}; font-size: 14px; font-weight: 600;")
+        video_title.setObjectName("videoTitle")
         title_container.addWidget(video_title)
         title_container.addStretch()
         title_widget = QWidget()
         title_widget.setLayout(title_container)
-        title_widget.setStyleSheet("padding: 12px 0 8px 0;")
+        title_widget.setObjectName("videoTitleBar")
         layout.addWidget(title_widget)
 
         # Vídeo
@@ -899,7 +1140,7 @@ class MainWindow(QMainWindow):
         placeholder_layout.addWidget(icon)
 
         txt = QLabel("Clique em\nINICIAR\npara monitorar")
-        txt.setStyleSheet(f"color: {ThemeColors.TEXT_SECONDARY}; font-size: 12px; line-height: 1.6;")
+        txt.setObjectName("videoPlaceholderText")
         txt.setAlignment(Qt.AlignCenter)
         txt.setWordWrap(True)
         placeholder_layout.addWidget(txt, alignment=Qt.AlignCenter)
@@ -910,7 +1151,7 @@ class MainWindow(QMainWindow):
         self.video_label.setAlignment(Qt.AlignCenter)
         self.video_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
         self.video_label.setScaledContents(False)
-        self.video_label.setStyleSheet("background-color: #000; border-radius: 8px;")
+        self.video_label.setObjectName("videoLabel")
         self.video_label.hide()
         v_layout.addWidget(self.video_label)
 
@@ -996,8 +1237,10 @@ class MainWindow(QMainWindow):
             self.rtsp_input.setFocus()
             return False
 
+        m = _STREAM_URL_RE.match(url)
+
         # Validar protocolo
-        if not url.startswith('rtsp://') and not url.startswith('http://') and not str(url).isdigit():
+        if m is None:
             QMessageBox.warning(
                 self,
                 "URL RTSP Inválida",
@@ -1008,21 +1251,33 @@ class MainWindow(QMainWindow):
             self.rtsp_input.setFocus()
             return False
 
-        # Validar formato básico de URL RTSP
-        if url.startswith('rtsp://'):
-            # Verificar se tem formato mínimo válido
-            if url.count('@') > 0:
-                # Tem credenciais - validar formato usuario:senha@ip
-                if url.count(':') < 2:
-                    QMessageBox.warning(
-                        self,
-                        "URL RTSP Inválida",
-                        "Formato de credenciais inválido.\n\n"
-                        "Formato esperado:\n"
-                        "rtsp://usuario:senha@ip:porta/caminho"
-                    )
-                    self.rtsp_input.setFocus()
-                    return False
+        if m.group('webcam'):
+            return True
+
+        # Credenciais presentes exigem usuário (formato usuario:senha@ip)
+        if m.group('scheme') == 'rtsp' and m.group('user') is not None and not m.group('user'):
+            QMessageBox.warning(
+                self,
+                "URL RTSP Inválida",
+                "Formato de credenciais inválido.\n\n"
+                "Formato esperado:\n"
+                "rtsp://usuario:senha@ip:porta/caminho"
+            )
+            self.rtsp_input.setFocus()
+            return False
+
+        # Endereço da câmera (ip/host) obrigatório
+        if not m.group('host'):
+            QMessageBox.warning(
+                self,
+                "URL RTSP Inválida",
+                f"Endereço da câmera (ip) ausente.\n\n"
+                f"Formato esperado:\n"
+                f"rtsp://usuario:senha@ip:porta/caminho\n\n"
+                f"URL fornecida: {url}"
+            )
+            self.rtsp_input.setFocus()
+            return False
 
         return True
 
@@ -1037,10 +1292,12 @@ class MainWindow(QMainWindow):
             current_model = self.config.get('modelo_yolo', 'yolo11n.pt')
             
             # Se o modelo atual não é o padrão, usá-lo como base para o diálogo
-            if 'yolo11n' not in current_model:
-                dialog = PersonalizedModelDialog(self, current_model)
+            base_model = current_model if 'yolo11n' not in current_model else None
+            if self._personalized_dialog is None:
+                self._personalized_dialog = PersonalizedModelDialog(self, base_model)
             else:
-                dialog = PersonalizedModelDialog(self, None)
+                self._personalized_dialog.set_current_model(base_model)
+            dialog = self._personalized_dialog
             
             if dialog.exec_() == QDialog.Accepted:
                 self.selected_model = dialog.get_selected_model()
@@ -1052,18 +1309,16 @@ class MainWindow(QMainWindow):
                     self.config.set('modelo_yolo', self.selected_model)
                 else:
                     # Se o usuário cancelou, voltar para o padrão
-                    self.modelo_combo.blockSignals(True)
-                    self.modelo_combo.setCurrentIndex(0)
+                    with QSignalBlocker(self.modelo_combo):
+                        self.modelo_combo.setCurrentIndex(0)
                     self.modelo_label.setText("yolo11n.pt")
                     self.selected_model = 'yolo11n.pt'
-                    self.modelo_combo.blockSignals(False)
             else:
                 # Usuário cancelou o diálogo, voltar para seleção anterior
-                self.modelo_combo.blockSignals(True)
-                self.modelo_combo.setCurrentIndex(0)
+                with QSignalBlocker(self.modelo_combo):
+                    self.modelo_combo.setCurrentIndex(0)
                 self.modelo_label.setText("yolo11n.pt")
                 self.selected_model = 'yolo11n.pt'
-                self.modelo_combo.blockSignals(False)
 
     def toggle_monitoring(self):
         # Passo 1: Iniciar Thread se necessário
@@ -1075,58 +1330,64 @@ class MainWindow(QMainWindow):
             if not self.validate_rtsp_url(rtsp_url):
                 return  # Não iniciar se URL inválida
 
-            self.config.set('rtsp_url', rtsp_url)
+            # Uma única gravação do config.json para todas as opções abaixo
+            # (inclui toggles ainda pendentes no timer de gravação adiada)
+            self._config_save_timer.stop()
+            with self.config.batch():
+                self.config.set('rtsp_url', rtsp_url)
 
-            # Usar o modelo selecionado (armazenado em self.selected_model)
-            modelo_selecionado = getattr(self, 'selected_model', 'yolo11n.pt')
-            self.add_log(f"[DEBUG] Iniciando com modelo: {modelo_selecionado}")
-            self.config.set('modelo_yolo', modelo_selecionado)
-            
-            # Verificação imediata do que foi salvo
-            salvo = self.config.get('modelo_yolo')
-            if salvo != modelo_selecionado:
-                self.add_log(f"[ERRO] Falha ao salvar config! Salvo: {salvo}")
-
-            self.config.set('tracker', 'bytetrack.yaml')  # Sempre usar ByteTrack
-            self.config.set('confianca_minima', self.conf_slider.value()/100.0)
-
-            # Desempenho
-            self.config.set('use_roi_crop', bool(self.cb_roi.isChecked()))
-
-            roi_crop = {
-                'top_percent': int(self.roi_top_slider.value()),
-                'bottom_percent': int(self.roi_bot_slider.value()),
-                'left_percent': int(self.roi_left_slider.value()),
-                'right_percent': int(self.roi_right_slider.value())
-            }
-            self.config.set('roi_crop', roi_crop)
+                # Usar o modelo selecionado (armazenado em self.selected_model)
+                modelo_selecionado = getattr(self, 'selected_model', 'yolo11n.pt')
+                self.add_log(f"[DEBUG] Iniciando com modelo: {modelo_selecionado}")
+                self.config.set('modelo_yolo', modelo_selecionado)
+
+                # Verificação imediata do que foi salvo
+                salvo = self.config.get('modelo_yolo')
+                if salvo != modelo_selecionado:
+                    self.add_log(f"[ERRO] Falha ao salvar config! Salvo: {salvo}")
+
+                self.config.set('tracker', 'bytetrack.yaml')  # Sempre usar ByteTrack
+                self.config.set('confianca_minima', self.conf_slider.value()/100.0)
+
+                # Desempenho
+                self.config.set('use_roi_crop', bool(self.cb_roi.isChecked()))
+
+                roi_crop = {
+                    'top_percent': int(self.roi_top_slider.value()),
+                    'bottom_percent': int(self.roi_bot_slider.value()),
+                    'left_percent': int(self.roi_left_slider.value()),
+                    'right_percent': int(self.roi_right_slider.value())
+                }
+                self.config.set('roi_crop', roi_crop)
 
-            # Visualização
-            self.config.set('counting_mode', 'line')  # Sempre usar linha
-            self.config.set('show_labels', not bool(self.cb_hide_labels.isChecked()))
-            self.config.set('hide_detection_lines', bool(self.cb_hide_lines.isChecked()))
+                # Visualização
+                self.config.set('counting_mode', 'line')  # Sempre usar linha
+                self.config.set('show_labels', not bool(self.cb_hide_labels.isChecked()))
+                self.config.set('hide_detection_lines', bool(self.cb_hide_lines.isChecked()))
 
-            # Exportação
-            self.config.set('export_folder', self.export_folder_input.text())
+                # Exportação
+                self.config.set('export_folder', self.export_folder_input.text())
 
             # Armazenar link RTSP atual
             self.current_rtsp_url = rtsp_url
 
-            # Atualizar abas com o novo RTSP URL
-            self.history_tab.set_rtsp_url(rtsp_url)
-            self.dashboard_tab.set_rtsp_url(rtsp_url)
+            # Atualizar abas com o novo RTSP URL (apenas as que já foram abertas)
+            if self.history_tab is not None:
+                self.history_tab.set_rtsp_url(rtsp_url)
+            if self.dashboard_tab is not None:
+                self.dashboard_tab.set_rtsp_url(rtsp_url)
 
             # Carregar contadores DESTE link RTSP específico
-            saved_counters = self.database.load_counters(rtsp_url=rtsp_url)
-            total = sum(saved_counters['total'].values())
-            if total > 0:
-                self.add_log(f"Restaurados {total} veículos contados anteriormente neste link")
+            saved_counters = snapshot_from_dict(self.database.load_counters(rtsp_url=rtsp_url))
+            if saved_counters.total > 0:
+                self.add_log(f"Restaurados {saved_counters.total} veículos contados anteriormente neste link")
                 # Atualizar interface com contadores carregados
                 self.update_counters(saved_counters)
 
             # Inicia thread (com banco de dados E link RTSP para persistir contagens)
             self.video_thread = VideoThread(self.config, database=self.database, rtsp_url=rtsp_url)
-            self.video_thread.change_pixmap_signal.connect(self.update_video)
+            # Frames atravessam threads: conexão enfileirada explícita
+            self.video_thread.change_pixmap_signal.connect(self.update_video, Qt.QueuedConnection)
             self.video_thread.update_counters.connect(self.update_counters)
             self.video_thread.update_status.connect(self.update_status)
             self.video_thread.log_message.connect(self.add_log)
@@ -1161,9 +1422,7 @@ class MainWindow(QMainWindow):
             self.video_thread = None
             thread.running = False
             thread._stop_requested.set()
-            if not hasattr(self, '_dying_threads'):
-                self._dying_threads = []
-            self._dying_threads.append(thread)
+            self._dying_threads.add(thread)
             def _bg_cleanup(t=thread):
                 import threading as _th
                 def _do():
@@ -1171,12 +1430,13 @@ class MainWindow(QMainWindow):
                         t.cleanup()
                     except Exception:
                         pass
-                    try:
-                        self._dying_threads.remove(t)
-                    except (ValueError, AttributeError):
-                        pass
+                    self._dying_threads.discard(t)
                 t.finished.connect(lambda: _th.Thread(target=_do, daemon=True).start())
             _bg_cleanup()
+            # Descartar frame ainda não desenhado para não reexibir o vídeo
+            self._paint_timer.stop()
+            self._pending_image = None
+            self._last_frame_pixmap = None
             self.video_label.hide()
             self.video_label.clear()
             self.video_placeholder.show()
@@ -1184,43 +1444,78 @@ class MainWindow(QMainWindow):
         elif not new_state:
             self.add_log("Contagem pausada. Câmera continua ativa.")
 
+    @pyqtSlot(QImage)
     def update_video(self, image: QImage):
+        """Recebe o frame da VideoThread; frames que chegam antes da próxima pintura são descartados"""
+        self._pending_image = image
+        if not self._paint_timer.isActive():
+            self._paint_timer.start()
+
+    def _flush_video(self):
+        """Desenha o frame mais recente recebido em update_video"""
+        image = self._pending_image
+        self._pending_image = None
+        if image is None:
+            return
+
         if self.video_placeholder.isVisible():
             self.video_placeholder.hide()
             self.video_label.show()
         
-        pixmap = QPixmap.fromImage(image)
         container_w = self.video_container.width()
         container_h = self.video_container.height()
-        scaled = pixmap.scaled(container_w, container_h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.video_label.setPixmap(scaled)
+        size = (container_w, container_h)
+        # A thread de vídeo já entrega o frame no tamanho da área; o próximo usa o tamanho atual
+        if self.video_thread is not None:
+            self.video_thread.set_display_size(container_w, container_h)
+
+        pixmap = QPixmap.fromImage(image, Qt.NoFormatConversion)
+        self._last_frame_pixmap = pixmap
+        if pixmap.width() > container_w or pixmap.height() > container_h:
+            # Área encolheu depois que o frame foi gerado. Suavização no primeiro frame de cada
+            # tamanho novo (durante um redimensionamento, todo frame); tamanho estável, escala rápida
+            mode = Qt.FastTransformation if size == self._last_scale_size else Qt.SmoothTransformation
+            pixmap = pixmap.scaled(container_w, container_h, Qt.KeepAspectRatio, mode)
+        self._last_scale_size = size
+        self.video_label.setPixmap(pixmap)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        if hasattr(self, 'video_label') and self.video_label.pixmap() and not self.video_label.pixmap().isNull():
-            pixmap = self.video_label.pixmap()
-            container_w = self.video_container.width()
-            container_h = self.video_container.height()
-            scaled = pixmap.scaled(container_w, container_h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.video_label.setPixmap(scaled)
+        # Redimensionamento feito na origem (VideoThread) a partir do próximo frame
+        if self.video_thread is not None and hasattr(self, 'video_container'):
+            self.video_thread.set_display_size(self.video_container.width(), self.video_container.height())
+        if self._rescale_last_frame(Qt.FastTransformation):
+            self._resize_timer.start()
+
+    def _final_rescale(self):
+        """Passada final com SmoothTransformation quando o usuário para de redimensionar"""
+        self._rescale_last_frame(Qt.SmoothTransformation)
+
+    def _rescale_last_frame(self, mode):
+        """Reescala o último frame para a área de vídeo atual; False se não há frame exibido"""
+        pixmap = self._last_frame_pixmap
+        if pixmap is None or pixmap.isNull() or not hasattr(self, 'video_label') or not self.video_label.isVisible():
+            return False
+        scaled = pixmap.scaled(self.video_container.width(), self.video_container.height(),
+                               Qt.KeepAspectRatio, mode)
+        self.video_label.setPixmap(scaled)
+        return True
 
     def is_shutting_down(self):
-        """Verifica se o sistema está encerrando (thread-safe)"""
-        with self._shutdown_lock:
-            return self._is_closing
+        """Verifica se o sistema está encerrando (leitura sem lock; ver invariante em __init__)"""
+        return self._is_closing
 
     def closeEvent(self, event):
         """
         🔒 SHUTDOWN SEGURO COM PROTEÇÃO CONTRA RACE CONDITIONS
-        Encerramento ordenado: timers → thread → banco → aceitar evento
+        Encerramento ordenado: timers → (worker) thread → banco → quit
         """
-        with self._shutdown_lock:
-            if self._is_closing:
-                # Já estamos encerrando, evitar duplicação
-                event.accept()
-                return
-            
-            self._is_closing = True
+        if self._is_closing:
+            # Já estamos encerrando (worker em andamento): quem sai é o quit() do worker
+            event.ignore()
+            return
+        # Marcado antes de parar/aguardar a thread de vídeo
+        self._is_closing = True
         
         try:
             print("\\n[SHUTDOWN] Iniciando encerramento seguro do sistema...")
@@ -1230,12 +1525,33 @@ class MainWindow(QMainWindow):
             try:
                 self.export_timer.stop()
                 self.export_schedule_timer.stop()
-                # Parar timers do relatório de fila
-                if hasattr(self, 'queue_reports') and self.queue_reports:
-                    self.queue_reports.stop_timers()
+                self._flush_config()  # Gravar alterações de config ainda pendentes
+                self._log_flush_timer.stop()
+                # Parar timers das abas (já construídas): nenhuma consulta ao banco durante o encerramento
+                for tab in (self.dashboard_tab, self.history_tab, self.queue_reports, self.queue_analysis):
+                    if tab is not None:
+                        tab.stop_timers()
+                if self.dashboard_tab is not None:
+                    self.dashboard_tab.closeEvent()
             except Exception as e:
                 print(f"[AVISO] Erro ao parar timers: {e}")
             
+            # ETAPAS 2–4 (aguardar a thread de vídeo, salvar e fechar o banco) podem levar
+            # segundos: rodam fora da UI thread. A janela some agora; ao terminar, o worker
+            # enfileira apenas o quit() na UI thread.
+            self.hide()
+            event.ignore()
+            threading.Thread(target=self._shutdown_worker, name="shutdown", daemon=False).start()
+            
+        except Exception as e:
+            print(f"[ERRO CRÍTICO] Falha no closeEvent: {e}")
+            import traceback
+            traceback.print_exc()
+            event.accept()  # Aceitar mesmo com erro para evitar travamento
+
+    def _shutdown_worker(self):
+        """ETAPAS 2–4 do closeEvent, fora da UI thread; depois enfileira o quit() na UI thread"""
+        try:
             # ETAPA 2: Parar a thread de vídeo se estiver rodando
             if self.video_thread and self.video_thread.running:
                 print("[SHUTDOWN] Encerrando thread de vídeo...")
@@ -1259,8 +1575,15 @@ class MainWindow(QMainWindow):
                     print("[SHUTDOWN] Cleanup da thread concluído")
                 except Exception as e:
                     print(f"[AVISO] Erro no cleanup: {e}")
-            
-            # ETAPA 4: Fechar banco de dados
+
+            # Workers que ainda possam ler o banco ou gravar relatórios terminam antes do close
+            if self.dashboard_tab is not None:
+                self.dashboard_tab.wait_worker(1000)
+            if self.history_tab is not None:
+                self.history_tab.wait_export_workers(5000)
+            QThreadPool.globalInstance().waitForDone(5000)
+
+            # ETAPA 4: Fechar banco de dados (conexão aberta com check_same_thread=False)
             if self.database:
                 try:
                     # Tentar salvar contadores uma última vez
@@ -1275,41 +1598,56 @@ class MainWindow(QMainWindow):
                     print("[SHUTDOWN] Banco de dados fechado")
                 except Exception as e:
                     print(f"[AVISO] Erro ao fechar banco: {e}")
-            
+
             print("[SHUTDOWN] Encerramento completo - saindo\\n")
-            event.accept()
-            
         except Exception as e:
-            print(f"[ERRO CRÍTICO] Falha no closeEvent: {e}")
+            print(f"[ERRO CRÍTICO] Falha no encerramento: {e}")
             import traceback
             traceback.print_exc()
-            event.accept()  # Aceitar mesmo com erro para evitar travamento
+        finally:
+            # Só o quit() volta à UI thread (chamada enfileirada, segura a partir deste worker)
+            QMetaObject.invokeMethod(QCoreApplication.instance(), "quit", Qt.QueuedConnection)
+
+    def eventFilter(self, obj, event):
+        if obj is self.monitoring_view and event.type() == QEvent.Show and self._pending_counters is not None:
+            self.update_counters(self._pending_counters)
+        return super().eventFilter(obj, event)
 
+    @pyqtSlot(object)
     def update_counters(self, contadores):
-        total = contadores['total']['ida'] + contadores['total']['volta']
-        self.total_label.setText(str(total))
-        self.ida_total_label.setText(f"{contadores['total']['ida']}")
-        self.volta_total_label.setText(f"{contadores['total']['volta']}")
-        
-        for cat, card in self.category_cards.items():
-            if cat in contadores:
-                tot = contadores[cat]['ida'] + contadores[cat]['volta']
-                card.count_label.setText(str(tot))
-                card.ida_label.setText(f"↑ {contadores[cat]['ida']}")
-                card.volta_label.setText(f"↓ {contadores[cat]['volta']}")
+        """Atualiza o painel de totais e os cards a partir de um CounterSnapshot"""
+        # Visão Geral oculta: guarda só o último estado e aplica quando a página aparecer
+        if not self.monitoring_view.isVisible():
+            self._pending_counters = contadores
+            return
+        self._pending_counters = None
 
+        last = self._last_counter_texts
 
+        def _set(label, text):
+            # setText só quando o valor muda (evita relayout/repaint do rótulo)
+            key = id(label)
+            if last.get(key) != text:
+                label.setText(text)
+                last[key] = text
 
-    def update_status(self, status):
-        if status == "Online":
-            self.status_label.setText("● Online")
-            self.status_label.setObjectName("statusOnline")
-        else:
-            self.status_label.setText(f"● {status}")
-            self.status_label.setObjectName("statusOffline")
+        _set(self.total_label, str(contadores.total))
+        _set(self.ida_total_label, str(contadores.total_ida))
+        _set(self.volta_total_label, str(contadores.total_volta))
         
-        self.status_label.style().unpolish(self.status_label)
-        self.status_label.style().polish(self.status_label)
+        for card, (ida, volta) in zip(self._cards_ordered, contadores.cats):
+            _set(card.count_label, str(ida + volta))
+            _set(card.ida_label, "↑ " + str(ida))
+            _set(card.volta_label, "↓ " + str(volta))
+
+    @pyqtSlot(str)
+    def update_status(self, status):
+        if status == self._last_status:
+            return
+        self._last_status = status
+
+        color = ThemeColors.SUCCESS if status == "Online" else ThemeColors.DANGER
+        self.status_label.setText(self._STATUS_HTML.format(color=color, status=html.escape(status)))
 
     def _toggle_log(self):
         if self.log_text.isVisible():
@@ -1319,9 +1657,21 @@ class MainWindow(QMainWindow):
             self.log_text.show()
             self.btn_toggle_log.setText("▲ Ocultar")
 
+    @pyqtSlot(str)
     def add_log(self, message):
         ts = datetime.now().strftime("%H:%M:%S")
-        self.log_text.append(f"[{ts}] {message}")
+        self._log_queue.append(f"[{ts}] {message}")
+        self._log_flush_timer.start()
+
+    def _flush_log(self):
+        """Escreve as mensagens acumuladas no log com um único repaint"""
+        messages, self._log_queue = self._log_queue, []
+        self.log_text.setUpdatesEnabled(False)
+        try:
+            for line in messages:
+                self.log_text.append(line)
+        finally:
+            self.log_text.setUpdatesEnabled(True)
 
     # CORRIGIDO: Método load_saved_counters() removido (código morto)
     # Contadores são carregados automaticamente ao iniciar detecção, baseados no link RTSP
@@ -1332,37 +1682,31 @@ class MainWindow(QMainWindow):
         if self.video_thread and self.video_thread.running:
             total = self.video_thread.counter.get_total()
 
-        from PyQt5.QtWidgets import QDialog, QVBoxLayout, QRadioButton, QDialogButtonBox
+        if self._reset_dialog is None:
+            self._reset_dialog = self._build_reset_dialog()
+        dialog = self._reset_dialog
+
+        # Só o texto dinâmico muda entre usos; a seleção volta para a opção segura
+        dialog.radio_reset_counter.setText(f"Resetar monitoramento atual  ({total} veículos)")
+        dialog.radio_reset_counter.setChecked(True)
+
+        if dialog.exec_() == QDialog.Accepted:
+            # Grupo exclusivo: uma única consulta diz qual opção ficou marcada
+            checked = dialog.reset_choice_group.checkedButton()
+            if checked is dialog.radio_reset_counter:
+                self._reset_counter_only(total)
+            elif checked is dialog.radio_reset_database:
+                self._reset_database_only()
+        else:
+            self.add_log("Reset cancelado pelo usuário")
 
+    def _build_reset_dialog(self):
+        """Constrói o diálogo de opções de reset (uma única vez; reaproveitado depois)"""
         dialog = QDialog(self)
         dialog.setWindowTitle("Opções de Reset")
         dialog.setMinimumWidth(480)
-        dialog.setStyleSheet(f"""
-            QDialog {{
-                background-color: {ThemeColors.BACKGROUND};
-            }}
-            QLabel {{
-                color: {ThemeColors.TEXT_PRIMARY};
-                background: transparent;
-            }}
-            QRadioButton {{
-                color: {ThemeColors.TEXT_PRIMARY};
-                background: transparent;
-                font-size: 13px;
-                font-weight: bold;
-            }}
-            QRadioButton::indicator {{
-                width: 15px;
-                height: 15px;
-                border-radius: 8px;
-                border: 2px solid {ThemeColors.BORDER};
-                background: {ThemeColors.SURFACE};
-            }}
-            QRadioButton::indicator:checked {{
-                border: 2px solid {ThemeColors.PRIMARY};
-                background: {ThemeColors.PRIMARY};
-            }}
-        """)
+        # Um stylesheet pré-montado para o diálogo inteiro (regras por objectName)
+        dialog.setStyleSheet(Styles.RESET_DIALOG)
 
         layout = QVBoxLayout()
         layout.setContentsMargins(24, 22, 24, 20)
@@ -1371,15 +1715,15 @@ class MainWindow(QMainWindow):
         # Header
         header_row = QHBoxLayout()
         icon_lbl = QLabel("⚠")
-        icon_lbl.setStyleSheet(f"font-size: 26px; color: {ThemeColors.WARNING}; padding-right: 4px;")
+        icon_lbl.setObjectName("resetIcon")
         header_row.addWidget(icon_lbl)
         header_row.addSpacing(6)
         titles = QVBoxLayout()
         titles.setSpacing(2)
         lbl_title = QLabel("Opções de Reset")
-        lbl_title.setStyleSheet(f"font-size: 16px; font-weight: bold; color: {ThemeColors.TEXT_PRIMARY};")
+        lbl_title.setObjectName("resetTitle")
         lbl_sub = QLabel("Escolha o tipo de reset a ser aplicado")
-        lbl_sub.setStyleSheet(f"font-size: 12px; color: {ThemeColors.TEXT_SECONDARY};")
+        lbl_sub.setObjectName("resetSubtitle")
         titles.addWidget(lbl_title)
         titles.addWidget(lbl_sub)
         header_row.addLayout(titles)
@@ -1389,108 +1733,62 @@ class MainWindow(QMainWindow):
         sep = QFrame()
         sep.setFrameShape(QFrame.HLine)
         sep.setFixedHeight(1)
-        sep.setStyleSheet(f"background-color: {ThemeColors.BORDER};")
+        sep.setObjectName("resetSeparator")
         layout.addWidget(sep)
 
         # Card opção 1 — segura
         card1 = QFrame()
-        card1.setStyleSheet(f"""
-            QFrame {{
-                background-color: {ThemeColors.SURFACE};
-                border: 1px solid {ThemeColors.BORDER};
-                border-radius: 8px;
-            }}
-        """)
+        card1.setStyleSheet(Styles.RESET_CARD_SAFE)
         c1 = QVBoxLayout(card1)
         c1.setContentsMargins(14, 12, 14, 12)
         c1.setSpacing(5)
-        self.radio_reset_counter = QRadioButton(f"Resetar monitoramento atual  ({total} veículos)")
-        self.radio_reset_counter.setChecked(True)
-        c1.addWidget(self.radio_reset_counter)
-        for line in [
-            "• Zera contadores da sessão atual (em memória)",
-            "• Limpa IDs de tracking ativos",
-            "• Dashboard e Histórico NÃO são afetados",
-            "• Dados salvos permanecem intactos",
-        ]:
-            l = QLabel(line)
-            l.setStyleSheet(f"font-size: 12px; color: {ThemeColors.TEXT_SECONDARY}; padding-left: 20px; font-weight: normal;")
-            c1.addWidget(l)
+        dialog.radio_reset_counter = QRadioButton()
+        c1.addWidget(dialog.radio_reset_counter)
+        # Um único QLabel com as linhas do card (estilo vem da regra QLabel do card)
+        c1.addWidget(QLabel(
+            "• Zera contadores da sessão atual (em memória)\n"
+            "• Limpa IDs de tracking ativos\n"
+            "• Dashboard e Histórico NÃO são afetados\n"
+            "• Dados salvos permanecem intactos"
+        ))
         layout.addWidget(card1)
 
         # Card opção 2 — destrutiva
         card2 = QFrame()
-        card2.setStyleSheet(f"""
-            QFrame {{
-                background-color: #150808;
-                border: 1px solid {ThemeColors.DANGER};
-                border-radius: 8px;
-            }}
-        """)
+        card2.setStyleSheet(Styles.RESET_CARD_DANGER)
         c2 = QVBoxLayout(card2)
         c2.setContentsMargins(14, 12, 14, 12)
         c2.setSpacing(5)
-        self.radio_reset_database = QRadioButton("Resetar TUDO (Banco de Dados + Monitoramento)")
-        self.radio_reset_database.setStyleSheet(f"color: {ThemeColors.DANGER}; font-weight: bold;")
-        self.radio_reset_database.setProperty("danger", True)
-        c2.addWidget(self.radio_reset_database)
+        dialog.radio_reset_database = QRadioButton("Resetar TUDO (Banco de Dados + Monitoramento)")
+        dialog.radio_reset_database.setObjectName("resetDatabaseRadio")
+        dialog.radio_reset_database.setProperty("danger", True)
+        c2.addWidget(dialog.radio_reset_database)
 
         # Garante exclusão mútua (radio buttons em QFrames diferentes não se agrupam automaticamente)
-        _btn_group = QButtonGroup(dialog)
-        _btn_group.addButton(self.radio_reset_counter)
-        _btn_group.addButton(self.radio_reset_database)
-
-        for line in [
-            "• APAGA Dashboard (gráficos e estatísticas)",
-            "• APAGA Histórico (todas as detecções)",
-            "• APAGA Monitoramento (contagem atual)",
-            "• AÇÃO IRREVERSÍVEL — Volta ao zero total!",
-        ]:
-            l = QLabel(line)
-            l.setStyleSheet("font-size: 12px; color: #f87171; padding-left: 20px; font-weight: normal;")
-            c2.addWidget(l)
+        dialog.reset_choice_group = QButtonGroup(dialog)
+        dialog.reset_choice_group.addButton(dialog.radio_reset_counter)
+        dialog.reset_choice_group.addButton(dialog.radio_reset_database)
+
+        c2.addWidget(QLabel(
+            "• APAGA Dashboard (gráficos e estatísticas)\n"
+            "• APAGA Histórico (todas as detecções)\n"
+            "• APAGA Monitoramento (contagem atual)\n"
+            "• AÇÃO IRREVERSÍVEL — Volta ao zero total!"
+        ))
         layout.addWidget(card2)
 
         # Botões
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         buttons.button(QDialogButtonBox.Ok).setText("Confirmar")
         buttons.button(QDialogButtonBox.Cancel).setText("Cancelar")
-        buttons.button(QDialogButtonBox.Ok).setStyleSheet(f"""
-            QPushButton {{
-                background-color: {ThemeColors.DANGER};
-                color: white;
-                border: none;
-                border-radius: 6px;
-                padding: 8px 22px;
-                font-weight: bold;
-                font-size: 13px;
-            }}
-            QPushButton:hover {{ background-color: #c0392b; }}
-        """)
-        buttons.button(QDialogButtonBox.Cancel).setStyleSheet(f"""
-            QPushButton {{
-                background-color: {ThemeColors.SURFACE_LIGHT};
-                color: {ThemeColors.TEXT_PRIMARY};
-                border: 1px solid {ThemeColors.BORDER};
-                border-radius: 6px;
-                padding: 8px 22px;
-                font-size: 13px;
-            }}
-            QPushButton:hover {{ background-color: {ThemeColors.BORDER}; }}
-        """)
+        buttons.button(QDialogButtonBox.Ok).setObjectName("resetConfirmButton")
+        buttons.button(QDialogButtonBox.Cancel).setObjectName("resetCancelButton")
         buttons.accepted.connect(dialog.accept)
         buttons.rejected.connect(dialog.reject)
         layout.addWidget(buttons)
 
         dialog.setLayout(layout)
-
-        if dialog.exec_() == QDialog.Accepted:
-            if self.radio_reset_counter.isChecked():
-                self._reset_counter_only(total)
-            elif self.radio_reset_database.isChecked():
-                self._reset_database_only()
-        else:
-            self.add_log("Reset cancelado pelo usuário")
+        return dialog
 
     def _reset_counter_only(self, total):
         """Reseta apenas os contadores em memória (não afeta banco de dados)"""
@@ -1514,12 +1812,7 @@ class MainWindow(QMainWindow):
 
             if reply == QMessageBox.Yes:
                 self.video_thread.counter.reset()
-                self.video_thread.track_last_center.clear()
-                self.video_thread.track_last_center_xy.clear()
-                self.video_thread.track_counted.clear()
-                self.video_thread.track_last_zone.clear()
-                self.video_thread.track_last_event_time.clear()
-                self.video_thread.track_last_seen.clear()
+                self.video_thread.reset_tracking()
                 self.add_log("Monitoramento resetado (Dashboard/Histórico preservados)")
                 QMessageBox.information(
                     self,
@@ -1589,12 +1882,7 @@ class MainWindow(QMainWindow):
             if self.video_thread and self.video_thread.running:
                 # CORRIGIDO: Usar reset_all() ao invés de reset()
                 self.video_thread.counter.reset_all()  # Limpa memória E banco
-                self.video_thread.track_last_center.clear()
-                self.video_thread.track_last_center_xy.clear()
-                self.video_thread.track_counted.clear()
-                self.video_thread.track_last_zone.clear()
-                self.video_thread.track_last_event_time.clear()
-                self.video_thread.track_last_seen.clear()
+                self.video_thread.reset_tracking()
             else:
                 # Se não estiver rodando, limpar banco diretamente
                 self.database.clear_all()
@@ -1618,32 +1906,17 @@ class MainWindow(QMainWindow):
                 f"Falha ao resetar banco de dados:\n\n{str(e)}"
             )
 
+    def _export_snapshot(self):
+        """Contadores para os relatórios: da thread em execução ou do banco (cache por link RTSP)"""
+        if self.video_thread is not None and self.video_thread.running:
+            return self.video_thread.counter.snapshot()
+        if not self.current_rtsp_url:
+            return snapshot_from_dict({'total': {'ida': 0, 'volta': 0}})
+        return snapshot_from_dict(self.database.load_counters(rtsp_url=self.current_rtsp_url))
+
     def export_report(self):
         try:
-            import pandas as pd
-            # Se o sistema está rodando, usar contador da thread; senão, carregar do banco
-            if self.video_thread is not None and self.video_thread.running:
-                counter = self.video_thread.counter
-            else:
-                # Criar um counter temporário e carregar dados do banco (com link RTSP atual)
-                counter = VehicleCounter(database=self.database, rtsp_url=self.current_rtsp_url)
-
-            dados = []
-
-            for cat in ['Carros','Motos','Caminhões','Ônibus']:
-                dados.append({
-                    'Categoria': cat,
-                    'Ida': counter.contadores[cat]['ida'],
-                    'Volta': counter.contadores[cat]['volta'],
-                    'Total': counter.contadores[cat]['ida'] + counter.contadores[cat]['volta']
-                })
-
-            dados.append({
-                'Categoria': 'TOTAL',
-                'Ida': counter.contadores['total']['ida'],
-                'Volta': counter.contadores['total']['volta'],
-                'Total': counter.get_total()
-            })
+            rows = _counter_report_rows(self._export_snapshot())
 
             # Diálogo para escolher onde salvar
             default_filename = f"relatorio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
@@ -1661,28 +1934,7 @@ class MainWindow(QMainWindow):
             if not filename.endswith('.xlsx'):
                 filename += '.xlsx'
 
-            df = pd.DataFrame(dados)
-
-            # Exportar com auto-ajuste de largura das colunas
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Relatório')
-
-                # Ajustar largura das colunas automaticamente
-                worksheet = writer.sheets['Relatório']
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-
-                    # Adicionar margem de 2 caracteres
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
+            _write_counter_report(filename, rows)
 
             self.add_log(f"Relatório exportado: {filename}")
             QMessageBox.information(self, "Sucesso", f"Relatório exportado com sucesso!\n\n{filename}")
@@ -1701,8 +1953,9 @@ class MainWindow(QMainWindow):
 
         dlg = ROIConfigDialog(self.video_thread, self.config, self)
         if dlg.exec_() == QDialog.Accepted:
-            self.config.set('counting_mode', 'line')  # Sempre usar linha
-            self.config.set('line_config', dlg.line_config)
+            with self.config.batch():
+                self.config.set('counting_mode', 'line')  # Sempre usar linha
+                self.config.set('line_config', dlg.line_config)
             self.add_log("Configuração de Linha salva com sucesso")
 
     def open_help_dialog(self):
@@ -1712,16 +1965,21 @@ class MainWindow(QMainWindow):
 
     def select_export_folder(self):
         """Abre diálogo para selecionar pasta padrão de exportação"""
+        options = QFileDialog.ShowDirsOnly
+        if self.config.get('fast_file_dialog', False):
+            options |= QFileDialog.DontUseNativeDialog
         folder = QFileDialog.getExistingDirectory(
             self,
             "Selecionar Pasta para Exportação",
             self.export_folder_input.text() or os.path.expanduser("~"),
-            QFileDialog.ShowDirsOnly
+            options
         )
 
         if folder:
             self.export_folder_input.setText(folder)
             self.config.set('export_folder', folder)
+            if self.history_tab is not None:
+                self.history_tab.invalidate_export_folder_cache()
             self.add_log(f"Pasta de exportação definida: {folder}")
 
     def update_auto_export(self, index):
@@ -1747,7 +2005,7 @@ class MainWindow(QMainWindow):
         if index == 5:
             self.export_time_label.setVisible(True)
             self.export_time_edit.setVisible(True)
-            self.export_schedule_timer.start()
+            self._arm_scheduled_export()
             scheduled_time = self.export_time_edit.time().toString("HH:mm")
             self.add_log(f"Exportação automática agendada para: {scheduled_time}")
             return
@@ -1761,40 +2019,37 @@ class MainWindow(QMainWindow):
         else:
             self.add_log("Exportação automática desativada")
 
-    def check_scheduled_export(self):
-        """
-        Verifica se chegou o horário configurado para exportação diária.
-        Executa apenas uma vez por dia no horário especificado.
-        """
+    def _arm_scheduled_export(self):
+        """Arma o timer (single-shot) para disparar no próximo horário configurado"""
         now = datetime.now()
-        current_time = now.time()
-        current_date = now.date()
-
-        # Obter horário configurado
         scheduled_time = self.export_time_edit.time().toPyTime()
-
-        # DEBUG: Sempre mostra verificação (comentar depois se quiser)
-        print(f"[DEBUG] Verificando exportação agendada - Atual: {current_time.strftime('%H:%M:%S')}, "
-              f"Agendado: {scheduled_time.strftime('%H:%M')}, "
-              f"Última exportação: {self.last_scheduled_export_date}")
-
-        # Calcular horários em minutos desde meia-noite
-        current_minutes = current_time.hour * 60 + current_time.minute
-        scheduled_minutes = scheduled_time.hour * 60 + scheduled_time.minute
-
-        # CORRIGIDO: Verifica se já passou do horário agendado E ainda não exportou hoje
-        # Permite uma janela de 2 minutos para garantir que não perca o horário
-        time_to_export = (current_minutes >= scheduled_minutes and
-                         current_minutes <= scheduled_minutes + 2)
-
-        if time_to_export and self.last_scheduled_export_date != current_date:
-            print(f"[INFO] Horário de exportação atingido: {scheduled_time.strftime('%H:%M')}")
-            self.auto_export_report()
-            self.last_scheduled_export_date = current_date  # Marca como exportado hoje
-            print(f"[INFO] Próxima exportação: amanhã às {scheduled_time.strftime('%H:%M')}")
+        next_run = now.replace(hour=scheduled_time.hour, minute=scheduled_time.minute,
+                               second=0, microsecond=0)
+        # Já passou hoje (ou já exportou hoje): próximo disparo amanhã
+        if next_run <= now or self.last_scheduled_export_date == now.date():
+            next_run += timedelta(days=1)
+
+        delay_ms = int((next_run - now).total_seconds() * 1000)
+        self.export_schedule_timer.start(delay_ms)
+        print(f"[INFO] Próxima exportação agendada: {next_run.strftime('%d/%m/%Y %H:%M')}")
+
+    def _on_export_time_changed(self, _time):
+        """Rearma a exportação agendada quando o horário é alterado"""
+        if self.auto_export_combo.currentIndex() == 5:
+            self._arm_scheduled_export()
+
+    def _on_scheduled_export(self):
+        """Disparo diário no horário configurado: exporta e rearma para o dia seguinte"""
+        scheduled_time = self.export_time_edit.time().toPyTime()
+        print(f"[INFO] Horário de exportação atingido: {scheduled_time.strftime('%H:%M')}")
+        self.auto_export_report()
+        self.last_scheduled_export_date = datetime.now().date()  # Marca como exportado hoje
+        # A exportação pode ter desativado o agendamento (pasta inválida): só rearma se seguir ativo
+        if self.auto_export_combo.currentIndex() == 5:
+            self._arm_scheduled_export()
 
     def auto_export_report(self):
-        """Exporta relatório automaticamente para a pasta padrão (executa em thread separada)"""
+        """Exporta relatório automaticamente para a pasta padrão (gravação no QThreadPool)"""
         # Verificar se já há uma exportação em andamento
         if self._export_in_progress:
             self.add_log("⏳ Exportação anterior ainda em andamento, aguardando...")
@@ -1814,291 +2069,38 @@ class MainWindow(QMainWindow):
             )
             return
 
-        # Marcar exportação como em andamento
-        self._export_in_progress = True
-
-        # Executar exportação em thread separada para não bloquear a GUI
-        export_thread = threading.Thread(
-            target=self._do_export_report,
-            args=(export_folder,),
-            daemon=True
-        )
-        export_thread.start()
-
-    def _do_export_report(self, export_folder):
-        """
-        Realiza a exportação Excel em background (roda em thread separada).
-        Agora com proteção robusta contra crashes por permissões/antivírus.
-        """
-        import time
-
+        # Linhas montadas aqui (rápido); o QThreadPool só grava o arquivo
         try:
-            # Se o sistema está rodando, usar contador da thread; senão, carregar do banco
-            if self.video_thread is not None and self.video_thread.running:
-                counter = self.video_thread.counter
-            else:
-                # Criar um counter temporário e carregar dados do banco
-                counter = VehicleCounter(database=self.database, rtsp_url=self.current_rtsp_url)
-
-            dados = []
-
-            for cat in ['Carros','Motos','Caminhões','Ônibus']:
-                dados.append({
-                    'Categoria': cat,
-                    'Ida': counter.contadores[cat]['ida'],
-                    'Volta': counter.contadores[cat]['volta'],
-                    'Total': counter.contadores[cat]['ida'] + counter.contadores[cat]['volta']
-                })
-
-            dados.append({
-                'Categoria': 'TOTAL',
-                'Ida': counter.contadores['total']['ida'],
-                'Volta': counter.contadores['total']['volta'],
-                'Total': counter.get_total()
-            })
-
-            # Gerar nome do arquivo com timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = os.path.join(export_folder, f"relatorio_{timestamp}.xlsx")
-
-            # Tentar exportar com retry (proteção contra antivírus/permissões)
-            max_retries = 3
-            retry_delay = 0.5
-
-            for attempt in range(max_retries):
-                try:
-                    # Operação de I/O que pode demorar
-                    df = pd.DataFrame(dados)
-
-                    # PROTEÇÃO: Tentar exportar com auto-width, se falhar usar exportação simples
-                    try:
-                        # Exportar com openpyxl para poder ajustar larguras
-                        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                            df.to_excel(writer, index=False, sheet_name='Relatório')
-
-                            # Ajustar largura das colunas automaticamente
-                            worksheet = writer.sheets['Relatório']
-                            for column in worksheet.columns:
-                                max_length = 0
-                                column_letter = column[0].column_letter
-
-                                for cell in column:
-                                    try:
-                                        if len(str(cell.value)) > max_length:
-                                            max_length = len(str(cell.value))
-                                    except:
-                                        pass
-
-                                # Adicionar margem de 2 caracteres
-                                adjusted_width = min(max_length + 2, 50)
-                                worksheet.column_dimensions[column_letter].width = adjusted_width
-
-                    except Exception as width_error:
-                        # Se auto-width falhar, exportar de forma simples (sem ajuste de largura)
-                        print(f"[AVISO] Auto-width falhou, exportando sem formatação: {type(width_error).__name__}")
-
-                        # Apagar arquivo parcial se existir
-                        if os.path.exists(filename):
-                            try:
-                                os.remove(filename)
-                            except:
-                                pass
-
-                        # Exportação simples sem formatação (mais robusta)
-                        df.to_excel(filename, index=False, sheet_name='Relatório', engine='openpyxl')
-
-                    # Sucesso!
-                    self.export_completed.emit(f"Relatório exportado: {filename}")
-                    return
-
-                except PermissionError as perm_error:
-                    if attempt < max_retries - 1:
-                        print(f"[AVISO] Arquivo Excel bloqueado (tentativa {attempt+1}/{max_retries})")
-                        time.sleep(retry_delay)
-                        retry_delay *= 2
-                    else:
-                        raise Exception(
-                            f"Arquivo bloqueado após {max_retries} tentativas.\n"
-                            f"Feche o Excel se estiver com o arquivo aberto."
-                        ) from perm_error
-
+            snapshot = self._export_snapshot()
         except Exception as e:
-            # Log detalhado para diagnóstico
-            import traceback
-            print(f"[ERRO] Falha na exportação Excel:")
-            print(f"  Tipo: {type(e).__name__}")
-            print(f"  Mensagem: {str(e)}")
-            print(f"  Detalhes:\n{traceback.format_exc()}")
+            print(f"[ERRO] Falha ao ler contadores para exportação: {e}")
+            self.add_log(f"Erro na exportação: {type(e).__name__}")
+            return
 
-            # Emitir sinal de erro thread-safe (mensagem amigável)
-            self.export_completed.emit(f"Erro na exportação: {type(e).__name__}")
+        signature = (export_folder, self.current_rtsp_url, snapshot)
+        if signature == self._last_export_signature:
+            self.add_log("Sem mudanças desde a última exportação — pulando")
+            return
+        rows = _counter_report_rows(snapshot)
 
-        finally:
-            # Liberar flag de exportação
-            self._export_in_progress = False
+        # Marcar exportação como em andamento
+        self._export_in_progress = True
+        self._pending_export_signature = signature
 
-    def apply_stylesheet(self):
-        # Combinar estilos globais
-        style = (
-            Styles.MAIN_WINDOW +
-            Styles.PANEL +
-            Styles.BUTTON_PRIMARY +
-            Styles.BUTTON_SECONDARY +
-            Styles.INPUT +
-            Styles.TABLE +
-            Styles.SCROLLBAR +
-            Styles.TAB_WIDGET +
-            Styles.SLIDER +
-            Styles.CHECKBOX +
-            Styles.TEXT_EDIT
-        )
-        
-        # Adicionar estilos específicos da MainWindow
-        style += f"""
-        #panelTitle {{ 
-            color: {ThemeColors.TEXT_PRIMARY}; 
-            font-size: 20px; 
-            font-weight: bold; 
-            padding: 10px; 
-        }}
-        #panelSubtitle {{ 
-            color: {ThemeColors.TEXT_SECONDARY}; 
-            font-size: 13px; 
-            padding-bottom: 15px; 
-        }}
-        
-        #startButton {{
-            background-color: {ThemeColors.SUCCESS};
-            font-size: 15px; 
-            padding: 14px 20px;
-        }}
-        #startButton:hover {{ background-color: #059669; }}
-        #startButton:pressed {{ background-color: #047857; }}
-        
-        #statusOnline {{ color: {ThemeColors.SUCCESS}; font-weight: bold; font-size: 14px; }}
-        #statusOffline {{ color: {ThemeColors.DANGER}; font-weight: bold; font-size: 14px; }}
-        
-        #totalFrame {{
-            background-color: {ThemeColors.BACKGROUND};
-            border-radius: 8px;
-            border: 1px solid {ThemeColors.SURFACE};
-        }}
-
-        #videoFrame {{
-            background-color: {ThemeColors.BACKGROUND};
-            border-radius: 8px;
-            border: 1px solid {ThemeColors.SURFACE};
-        }}
-
-        #cardTitle {{
-            color: {ThemeColors.TEXT_PRIMARY}; font-size: 11px; font-weight: 600;
-            text-transform: uppercase; letter-spacing: 0.3px;
-        }}
-        #cardCount {{
-            color: {ThemeColors.TEXT_PRIMARY}; font-size: 36px; font-weight: 900;
-            padding: 4px 0 6px 0;
-            line-height: 1.0;
-            min-height: 45px;
-        }}
-        #cardDirection {{ color: {ThemeColors.TEXT_PRIMARY}; font-size: 14px; font-weight: 600; }}
-        """
+        runnable = _ExportRunnable(export_folder, rows)
+        runnable.signals.finished.connect(self._on_export_finished)
+        QThreadPool.globalInstance().start(runnable)
 
-        # Estilos para QMessageBox (herdam do pai por serem filhos do MainWindow)
-        style += f"""
-        QMessageBox {{
-            background-color: {ThemeColors.BACKGROUND};
-            color: {ThemeColors.TEXT_PRIMARY};
-        }}
-        QMessageBox QLabel {{
-            color: {ThemeColors.TEXT_PRIMARY};
-            background: transparent;
-            font-size: 13px;
-        }}
-        QMessageBox QPushButton {{
-            background-color: {ThemeColors.PRIMARY};
-            color: white;
-            border: none;
-            border-radius: 5px;
-            padding: 6px 18px;
-            min-width: 70px;
-            font-weight: bold;
-        }}
-        QMessageBox QPushButton:hover {{
-            background-color: {ThemeColors.PRIMARY_HOVER};
-        }}
-        QMessageBox QPushButton:default {{
-            background-color: {ThemeColors.PRIMARY};
-        }}
-
-        QMenu {{
-            background-color: {ThemeColors.SURFACE};
-            color: {ThemeColors.TEXT_PRIMARY};
-            border: 1px solid {ThemeColors.BORDER};
-            border-radius: 6px;
-            padding: 4px;
-        }}
-        QMenu::item {{
-            padding: 6px 24px 6px 12px;
-            border-radius: 4px;
-        }}
-        QMenu::item:selected {{
-            background-color: {ThemeColors.PRIMARY};
-            color: white;
-        }}
-        QMenu::item:disabled {{
-            color: {ThemeColors.TEXT_ALT};
-        }}
-        QMenu::separator {{
-            height: 1px;
-            background: {ThemeColors.BORDER};
-            margin: 4px 8px;
-        }}
-
-        QInputDialog {{
-            background-color: {ThemeColors.BACKGROUND};
-            color: {ThemeColors.TEXT_PRIMARY};
-        }}
-        QInputDialog QLabel {{
-            color: {ThemeColors.TEXT_PRIMARY};
-            background: transparent;
-            font-size: 13px;
-        }}
-        QInputDialog QLineEdit {{
-            background-color: {ThemeColors.SURFACE};
-            color: {ThemeColors.TEXT_PRIMARY};
-            border: 1px solid {ThemeColors.BORDER};
-            border-radius: 5px;
-            padding: 6px 10px;
-            font-size: 13px;
-        }}
-        QInputDialog QLineEdit:focus {{
-            border-color: {ThemeColors.PRIMARY};
-        }}
-        QInputDialog QPushButton {{
-            background-color: {ThemeColors.PRIMARY};
-            color: white;
-            border: none;
-            border-radius: 5px;
-            padding: 6px 18px;
-            min-width: 70px;
-            font-weight: bold;
-        }}
-        QInputDialog QPushButton:hover {{
-            background-color: {ThemeColors.PRIMARY_HOVER};
-        }}
-        QInputDialog QPushButton[text="Cancel"],
-        QInputDialog QPushButton[text="Cancelar"] {{
-            background-color: {ThemeColors.SURFACE};
-            color: {ThemeColors.TEXT_PRIMARY};
-            border: 1px solid {ThemeColors.BORDER};
-        }}
-        QInputDialog QPushButton[text="Cancel"]:hover,
-        QInputDialog QPushButton[text="Cancelar"]:hover {{
-            background-color: {ThemeColors.BORDER};
-        }}
-        """
+    def _on_export_finished(self, message, ok):
+        """Fim da exportação automática (thread da GUI): libera a flag e registra no log"""
+        self._export_in_progress = False
+        if ok:
+            self._last_export_signature = self._pending_export_signature
+        self._pending_export_signature = None
+        self.add_log(message)
 
-        self.setStyleSheet(style)
+    def apply_stylesheet(self):
+        self.setStyleSheet(Styles.MAIN_WINDOW_QSS)
 
 # ========================= Diálogo ROI =========================
 class ROIConfigDialog(QDialog):
@@ -2113,30 +2115,24 @@ class ROIConfigDialog(QDialog):
         self.resize(win_w, win_h)
         self.video_thread = video_thread
         self.config = config
-
-        # Aplicar estilo dark mode
-        self.setStyleSheet(f"""
-            QDialog {{
-                background-color: {ThemeColors.BACKGROUND};
-                color: {ThemeColors.TEXT_PRIMARY};
-            }}
-            QLabel {{
-                color: {ThemeColors.TEXT_PRIMARY};
-            }}
-            {Styles.PANEL}
-            {Styles.BUTTON_PRIMARY}
-            {Styles.SLIDER}
-            {Styles.INPUT}
-        """)
         
         # Carregar frame inicial
         if self.video_thread.last_frame is not None:
-            self.frame = cv2.cvtColor(self.video_thread.last_frame, cv2.COLOR_BGR2RGB)
+            self.frame = cv2.cvtColor(self.video_thread.last_frame, cv2.COLOR_BGR2BGRA)
         else:
             # Fallback (não deve acontecer devido à verificação anterior)
-            self.frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+            self.frame = np.full((720, 1280, 4), (0, 0, 0, 255), dtype=np.uint8)
             
         self.h, self.w = self.frame.shape[:2]
+        # Buffer de desenho do canvas, reutilizado entre refreshes: a cada refresh só a
+        # região desenhada no anterior (_canvas_dirty) é restaurada a partir do frame
+        self._canvas_buf = None
+        self._canvas_dirty = None
+        # Redesenho coalescido: no máximo um refresh a cada ~16 ms durante arrastes rápidos
+        self._redraw_timer = QTimer(self)
+        self._redraw_timer.setSingleShot(True)
+        self._redraw_timer.setInterval(16)
+        self._redraw_timer.timeout.connect(self._do_refresh_canvas)
 
         self.counting_mode = 'line'  # Sempre usar linha
         self.line_config = dict(config.get('line_config', {
@@ -2158,17 +2154,17 @@ class ROIConfigDialog(QDialog):
         main_layout.setContentsMargins(20, 20, 20, 20)
 
         header = QLabel("Configure a Linha de Contagem")
-        header.setStyleSheet(f"font-size: 18px; font-weight: bold; color: {ThemeColors.TEXT_PRIMARY};")
+        header.setObjectName("roiDialogHeader")
         main_layout.addWidget(header)
 
         info = QLabel("Arraste a linha para ajustar a posição. Veículos serão contados ao cruzarem esta linha.")
-        info.setStyleSheet(f"color: {ThemeColors.TEXT_SECONDARY}; font-size: 12px; margin-bottom: 10px;")
+        info.setObjectName("roiDialogInfo")
         main_layout.addWidget(info)
 
         self.canvas = QLabel()
         self.canvas.setMinimumSize(600, 400)
         self.canvas.setAlignment(Qt.AlignCenter)
-        self.canvas.setStyleSheet(f"background: {ThemeColors.BACKGROUND}; border: 2px solid {ThemeColors.SURFACE}; border-radius: 8px;")
+        self.canvas.setObjectName("roiDialogCanvas")
         main_layout.addWidget(self.canvas, 1)
 
         # ---- Opções de Sentido ----
@@ -2213,19 +2209,12 @@ class ROIConfigDialog(QDialog):
         main_layout.addWidget(buttons)
 
         self.canvas.installEventFilter(self)
-        self.refresh_canvas()
+        self._do_refresh_canvas()  # Primeiro desenho imediato: o eventFilter depende do pixmap
         self.apply_dialog_style()
 
     def apply_dialog_style(self):
-        # Reutilizar estilos globais
-        style = (
-            Styles.MAIN_WINDOW +
-            Styles.INPUT +
-            Styles.BUTTON_PRIMARY +
-            Styles.BUTTON_SECONDARY +
-            Styles.PANEL
-        )
-        self.setStyleSheet(style)
+        # Estilos globais + rótulos do diálogo, montados uma vez em Styles.ROI_DIALOG
+        self.setStyleSheet(Styles.ROI_DIALOG)
 
     def ratios_to_pixels_line(self):
         x1   = int(self.line_config['x1_ratio']  * self.w)
@@ -2248,18 +2237,37 @@ class ROIConfigDialog(QDialog):
         self.line_config['x_mid_ratio'] = max(x1r, min(x2r, self.line_config['x_mid_ratio']))
 
     def refresh_canvas(self):
+        """Agenda o redesenho do canvas (chamadas seguidas viram um único refresh)"""
+        if not self._redraw_timer.isActive():
+            self._redraw_timer.start()
+
+    def _do_refresh_canvas(self):
         self.clamp_ratios()
-        img = self.frame.copy()
 
         x1, x_mid, x2, y = self.ratios_to_pixels_line()
         band = int(self.line_config.get('band_px', 2))
+
+        img = self._canvas_buf
+        if img is None or img.shape != self.frame.shape:
+            img = self._canvas_buf = self.frame.copy()
+        elif self._canvas_dirty is not None:
+            rows, cols = self._canvas_dirty
+            img[rows, cols] = self.frame[rows, cols]
+        # Tudo o que é desenhado abaixo (banda, segmentos, rótulos e handles) cabe nesta região
+        self._canvas_dirty = (
+            slice(max(0, y - max(band, 40) - 12), min(self.h, y + max(band, 16) + 12)),
+            slice(max(0, x1 - 60), min(self.w, x2 + 100)),
+        )
+
         invert = bool(self.line_config.get('invert_direction', False))
         direction_mode = self.line_config.get('direction_mode', 'both')
 
-        # Cores (RGB pois frame já foi convertido para RGB)
-        ida_color   = (80, 220, 80)    # verde
-        volta_color = (220, 80, 80)    # vermelho
-        dim_color   = (110, 110, 110)  # cinza para lado desabilitado
+        # Cores em BGRA (frame em BGRA; alfa 255, exigido pelo Format_RGB32)
+        ida_color   = (80, 220, 80, 255)    # verde
+        volta_color = (80, 80, 220, 255)    # vermelho
+        dim_color   = (110, 110, 110, 255)  # cinza para lado desabilitado
+        handle_color = (80, 80, 255, 255)   # vermelho claro (L/R)
+        white = (255, 255, 255, 255)
 
         left_color  = volta_color if invert else ida_color
         right_color = ida_color   if invert else volta_color
@@ -2273,13 +2281,16 @@ class ROIConfigDialog(QDialog):
             show_left  = direction_mode != 'volta_only'
             show_right = direction_mode != 'ida_only'
 
-        # Área semi-transparente da banda
-        overlay = img.copy()
-        if show_left and x_mid > x1:
-            cv2.rectangle(overlay, (x1, y - band), (x_mid, y + band), left_color, -1)
-        if show_right and x2 > x_mid:
-            cv2.rectangle(overlay, (x_mid, y - band), (x2, y + band), right_color, -1)
-        img = cv2.addWeighted(overlay, 0.3, img, 0.7, 0)
+        # Área semi-transparente da banda: a mistura roda só na faixa da banda, não no frame inteiro
+        by0 = max(0, y - band)
+        strip = img[by0:y + band + 1, x1:x2 + 1]
+        if strip.size and ((show_left and x_mid > x1) or (show_right and x2 > x_mid)):
+            overlay = strip.copy()
+            if show_left and x_mid > x1:
+                cv2.rectangle(overlay, (0, y - band - by0), (x_mid - x1, y + band - by0), left_color, -1)
+            if show_right and x2 > x_mid:
+                cv2.rectangle(overlay, (x_mid - x1, y - band - by0), (x2 - x1, y + band - by0), right_color, -1)
+            strip[:] = cv2.addWeighted(overlay, 0.3, strip, 0.7, 0)
 
         # Segmento esquerdo
         if show_left and x_mid > x1:
@@ -2305,39 +2316,40 @@ class ROIConfigDialog(QDialog):
             cv2.putText(img, right_label, (rx - 34, y - 18), font, 0.75, right_color, 2)
 
         # Handle L (esquerda)
-        cv2.circle(img, (x1, y), 12, (255, 80, 80), -1)
-        cv2.circle(img, (x1, y), 14, (255, 255, 255), 2)
-        cv2.putText(img, "L", (x1 - 8, y + 5), font, 0.5, (255, 255, 255), 2)
+        cv2.circle(img, (x1, y), 12, handle_color, -1)
+        cv2.circle(img, (x1, y), 14, white, 2)
+        cv2.putText(img, "L", (x1 - 8, y + 5), font, 0.5, white, 2)
 
         # Handle R (direita)
-        cv2.circle(img, (x2, y), 12, (255, 80, 80), -1)
-        cv2.circle(img, (x2, y), 14, (255, 255, 255), 2)
-        cv2.putText(img, "R", (x2 - 8, y + 5), font, 0.5, (255, 255, 255), 2)
+        cv2.circle(img, (x2, y), 12, handle_color, -1)
+        cv2.circle(img, (x2, y), 14, white, 2)
+        cv2.putText(img, "R", (x2 - 8, y + 5), font, 0.5, white, 2)
 
         # Handle M (meio — divide IDA/VOLTA, arraste horizontal)
-        cv2.circle(img, (x_mid, y), 12, (255, 180, 0), -1)   # laranja
-        cv2.circle(img, (x_mid, y), 14, (255, 255, 255), 2)
-        cv2.putText(img, "M", (x_mid - 8, y + 5), font, 0.5, (0, 0, 0), 2)
+        cv2.circle(img, (x_mid, y), 12, (0, 180, 255, 255), -1)   # laranja
+        cv2.circle(img, (x_mid, y), 14, white, 2)
+        cv2.putText(img, "M", (x_mid - 8, y + 5), font, 0.5, (0, 0, 0, 255), 2)
 
 
-        # Ensure contiguous array and correct bytes per line
-        if not img.flags['C_CONTIGUOUS']:
-            img = np.ascontiguousarray(img)
-            
+        # _canvas_buf é uma cópia própria do frame: sempre contígua
         height, width, channel = img.shape
-        bytes_per_line = 3 * width
+        bytes_per_line = 4 * width
         
         # Keep reference to data to prevent garbage collection
         self._qimage_data = img
         
-        qimg = QImage(img.data, width, height, bytes_per_line, QImage.Format_RGB888)
-        pix = QPixmap.fromImage(qimg).scaled(
+        # BGRA na memória = Format_RGB32 (0xffRRGGBB), o formato nativo de desenho do Qt: sem conversão
+        qimg = QImage(img.data, width, height, bytes_per_line, QImage.Format_RGB32)
+        # Escala ainda como QImage: só a imagem já reduzida vira pixmap.
+        # Arrastando um handle, escala rápida; a versão suavizada sai ao soltar o botão
+        mode = Qt.FastTransformation if self.active_handle else Qt.SmoothTransformation
+        scaled = qimg.scaled(
             self.canvas.width() - 10,
             self.canvas.height() - 10,
             Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
+            mode
         )
-        self.canvas.setPixmap(pix)
+        self.canvas.setPixmap(QPixmap.fromImage(scaled))
 
     def on_y_slider(self, val):
         self.line_config['y_ratio'] = val / 100.0
@@ -2358,7 +2370,9 @@ class ROIConfigDialog(QDialog):
                 self._handle_mouse(event, press=False)
                 return True
             elif event.type() == QEvent.MouseButtonRelease:
-                self.active_handle = None
+                if self.active_handle is not None:
+                    self.active_handle = None
+                    self.refresh_canvas()  # Redesenho final com escala suavizada
                 return True
         return super().eventFilter(obj, event)
 
@@ -2431,8 +2445,9 @@ class ROIConfigDialog(QDialog):
                 if frame is None or frame.size == 0:
                     raise ValueError("Frame inválido ou vazio")
 
-                self.frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                self.frame = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
                 self.h, self.w = self.frame.shape[:2]
+                self._canvas_buf = None  # Frame novo: o buffer de desenho é refeito
                 self.refresh_canvas()
                 
                 # Feedback visual rápido
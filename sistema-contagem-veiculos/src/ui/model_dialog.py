@@ -115,10 +115,10 @@ class PersonalizedModelDialog(QDialog):
         layout.addSpacing(10)
 
         # Opção para modelo customizado
-        custom_radio = QRadioButton("Carregar modelo customizado (.pt)")
-        custom_radio.toggled.connect(self._on_custom_toggled)
-        self.model_group.addButton(custom_radio, 2)
-        layout.addWidget(custom_radio)
+        self.custom_radio = QRadioButton("Carregar modelo customizado (.pt)")
+        self.custom_radio.toggled.connect(self._on_custom_toggled)
+        self.model_group.addButton(self.custom_radio, 2)
+        layout.addWidget(self.custom_radio)
 
         # Campo para arquivo customizado
         self.custom_file_layout = QHBoxLayout()
@@ -142,16 +142,7 @@ class PersonalizedModelDialog(QDialog):
         layout.addLayout(self.custom_file_layout)
 
         # Set modelo atual como selecionado
-        if current_model:
-            if 'yolo11n' in current_model:
-                self.model_group.button(0).setChecked(True)
-            elif 'yolo11s' in current_model:
-                self.model_group.button(1).setChecked(True)
-            else:
-                custom_radio.setChecked(True)
-                self.custom_file_input.setText(current_model)
-        else:
-            self.model_group.button(0).setChecked(True)  # Default yolo11n
+        self.set_current_model(current_model)
 
         # Botões
         layout.addSpacing(10)
@@ -169,6 +160,21 @@ class PersonalizedModelDialog(QDialog):
 
         self.setLayout(layout)
 
+    def set_current_model(self, current_model):
+        """Marca o modelo atual como selecionado (permite reaproveitar o diálogo)"""
+        self.selected_model = None
+        self.custom_file_input.clear()
+        if current_model:
+            if 'yolo11n' in current_model:
+                self.model_group.button(0).setChecked(True)
+            elif 'yolo11s' in current_model:
+                self.model_group.button(1).setChecked(True)
+            else:
+                self.custom_radio.setChecked(True)
+                self.custom_file_input.setText(current_model)
+        else:
+            self.model_group.button(0).setChecked(True)  # Default yolo11n
+
     def _get_model_desc(self, model_name):
         """Retorna descrição do modelo"""
         descs = {
@@ -149,6 +149,10 @@ class QueueAnalysisTab(QWidget):
         self.refresh_timer = QTimer()
         self.refresh_timer.timeout.connect(self.refresh_data)
 
+    def stop_timers(self):
+        """Para todos os timers — chamar no encerramento da aplicação."""
+        self.refresh_timer.stop()
+
     # ------------------------------------------------------------------
     # Construção da UI
     # ------------------------------------------------------------------
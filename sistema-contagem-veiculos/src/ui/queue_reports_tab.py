@@ -195,9 +195,10 @@ class QueueReportsTab(QWidget):
         self.export_timer = QTimer()
         self.export_timer.timeout.connect(self.auto_export_queue_report)
 
+        # Horário específico: um único disparo no próximo horário (rearmado a cada execução)
         self.export_schedule_timer = QTimer()
-        self.export_schedule_timer.setInterval(60000)
-        self.export_schedule_timer.timeout.connect(self.check_scheduled_export)
+        self.export_schedule_timer.setSingleShot(True)
+        self.export_schedule_timer.timeout.connect(self._on_scheduled_export)
 
         self.export_done.connect(self._on_export_done)
 
@@ -429,6 +430,7 @@ class QueueReportsTab(QWidget):
         self.auto_export_time.setDisplayFormat("HH:mm")
         self.auto_export_time.setMaximumWidth(80)
         self.auto_export_time.setVisible(False)
+        self.auto_export_time.timeChanged.connect(self._on_export_time_changed)
         interval_row.addWidget(self.auto_export_time)
 
         interval_row.addStretch()
@@ -857,10 +859,13 @@ class QueueReportsTab(QWidget):
     # ------------------------------------------------------------------
 
     def _select_export_folder(self):
+        options = QFileDialog.ShowDirsOnly
+        if self.main_window and self.main_window.config.get('fast_file_dialog', False):
+            options |= QFileDialog.DontUseNativeDialog
         folder = QFileDialog.getExistingDirectory(
             self, "Selecionar Pasta para Exportação Automática",
             self.auto_export_folder.text() or os.path.expanduser("~"),
-            QFileDialog.ShowDirsOnly
+            options
         )
         if folder:
             self.auto_export_folder.setText(folder)
@@ -876,7 +881,7 @@ class QueueReportsTab(QWidget):
         if index == 5:  # Horário específico
             self._lbl_at.setVisible(True)
             self.auto_export_time.setVisible(True)
-            self.export_schedule_timer.start()
+            self._arm_scheduled_export()
             return
 
         intervals = {1: 5*60_000, 2: 10*60_000, 3: 30*60_000, 4: 60*60_000}
@@ -884,17 +889,30 @@ class QueueReportsTab(QWidget):
         if ms:
             self.export_timer.start(ms)
 
-    def check_scheduled_export(self):
-        from datetime import date as _date, datetime as _dt
-        current_time = _dt.now()
-        current_date = _date.today()
-        scheduled = self.auto_export_time.time()
-        scheduled_minutes = scheduled.hour() * 60 + scheduled.minute()
-        current_minutes = current_time.hour * 60 + current_time.minute
-        in_window = scheduled_minutes <= current_minutes <= scheduled_minutes + 2
-        if in_window and self.last_scheduled_export_date != current_date:
-            self.auto_export_queue_report()
-            self.last_scheduled_export_date = current_date
+    def _arm_scheduled_export(self):
+        """Arma o timer (single-shot) para disparar no próximo horário configurado"""
+        now = datetime.now()
+        scheduled_time = self.auto_export_time.time().toPyTime()
+        next_run = now.replace(hour=scheduled_time.hour, minute=scheduled_time.minute,
+                               second=0, microsecond=0)
+        # Já passou hoje (ou já exportou hoje): próximo disparo amanhã
+        if next_run <= now or self.last_scheduled_export_date == now.date():
+            next_run += timedelta(days=1)
+
+        self.export_schedule_timer.start(int((next_run - now).total_seconds() * 1000))
+
+    def _on_export_time_changed(self, _time):
+        """Rearma a exportação agendada quando o horário é alterado"""
+        if self.auto_export_combo.currentIndex() == 5:
+            self._arm_scheduled_export()
+
+    def _on_scheduled_export(self):
+        """Disparo diário no horário configurado: exporta e rearma para o dia seguinte"""
+        self.auto_export_queue_report()
+        self.last_scheduled_export_date = datetime.now().date()
+        # A exportação pode ter desativado o agendamento (pasta inválida): só rearma se seguir ativo
+        if self.auto_export_combo.currentIndex() == 5:
+            self._arm_scheduled_export()
 
     def auto_export_queue_report(self):
         if self._export_in_progress:
@@ -2,6 +2,8 @@
 """
 Sistema de estilos centralizado para a aplicação (Dark Theme Moderno)
 """
+from functools import lru_cache
+
 from .styles_helper import get_input_styles_with_icons, get_checkbox_styles_with_icons
 
 class ThemeColors:
@@ -452,6 +454,10 @@ class Styles:
         }}
     """
 
+    # Mesmas regras do COMBO_BOX_VIEW para um stylesheet de janela: vale para
+    # a lista de qualquer QComboBox descendente, sem view().setStyleSheet por combo
+    COMBO_BOX_POPUP = COMBO_BOX_VIEW.replace("QListView", "QComboBox QAbstractItemView")
+
     ICON_BUTTON = f"""
         QPushButton {{
             background-color: transparent;
@@ -508,6 +514,23 @@ class Styles:
         border: 1px solid {ThemeColors.SURFACE};
         border-radius: 4px;
     """
+    # Texto sobreposto ao preview (estilo próprio para não herdar a borda do ROI_PREVIEW)
+    ROI_PREVIEW_TEXT = f"color: {ThemeColors.TEXT_PRIMARY}; background: transparent; border: none;"
+
+    # Visão Geral (MainWindow): painel de totais e área de vídeo, aplicado uma vez no painel
+    MONITORING_VIEW = f"""
+        QLabel#totalTitle {{ color: {ThemeColors.TEXT_SECONDARY}; font-size: 12px; font-weight: 600; }}
+        QLabel#totalCount {{ color: {ThemeColors.TEXT_PRIMARY}; font-size: 42px; font-weight: 900; }}
+        QLabel#idaTitle {{ color: {ThemeColors.SUCCESS}; font-size: 12px; font-weight: 600; }}
+        QLabel#voltaTitle {{ color: {ThemeColors.DANGER}; font-size: 12px; font-weight: 600; }}
+        QLabel#idaCount, QLabel#voltaCount {{
+            color: {ThemeColors.TEXT_PRIMARY}; font-size: 28px; font-weight: 700;
+        }}
+        QWidget#videoTitleBar QLabel {{ padding: 12px 0 8px 0; }}
+        QLabel#videoTitle {{ color: {ThemeColors.TEXT_SECONDARY}; font-size: 14px; font-weight: 600; }}
+        QLabel#videoPlaceholderText {{ color: {ThemeColors.TEXT_SECONDARY}; font-size: 12px; line-height: 1.6; }}
+        QLabel#videoLabel {{ background-color: #000; border-radius: 8px; }}
+    """
 
     SLIDER = f"""
         QSlider::groove:horizontal {{
@@ -583,9 +606,272 @@ class Styles:
         }}
     """
 
+    # Diálogo "Opções de Reset" (MainWindow)
+    RESET_DIALOG = f"""
+        QDialog {{
+            background-color: {ThemeColors.BACKGROUND};
+        }}
+        QLabel {{
+            color: {ThemeColors.TEXT_PRIMARY};
+            background: transparent;
+        }}
+        QRadioButton {{
+            color: {ThemeColors.TEXT_PRIMARY};
+            background: transparent;
+            font-size: 13px;
+            font-weight: bold;
+        }}
+        QRadioButton::indicator {{
+            width: 15px;
+            height: 15px;
+            border-radius: 8px;
+            border: 2px solid {ThemeColors.BORDER};
+            background: {ThemeColors.SURFACE};
+        }}
+        QRadioButton::indicator:checked {{
+            border: 2px solid {ThemeColors.PRIMARY};
+            background: {ThemeColors.PRIMARY};
+        }}
+        QLabel#resetIcon {{ font-size: 26px; color: {ThemeColors.WARNING}; padding-right: 4px; }}
+        QLabel#resetTitle {{ font-size: 16px; font-weight: bold; color: {ThemeColors.TEXT_PRIMARY}; }}
+        QLabel#resetSubtitle {{ font-size: 12px; color: {ThemeColors.TEXT_SECONDARY}; }}
+        QFrame#resetSeparator {{ background-color: {ThemeColors.BORDER}; }}
+        QRadioButton#resetDatabaseRadio {{ color: {ThemeColors.DANGER}; font-weight: bold; }}
+        QPushButton#resetConfirmButton {{
+            background-color: {ThemeColors.DANGER};
+            color: white;
+            border: none;
+            border-radius: 6px;
+            padding: 8px 22px;
+            font-weight: bold;
+            font-size: 13px;
+        }}
+        QPushButton#resetConfirmButton:hover {{ background-color: #c0392b; }}
+        QPushButton#resetCancelButton {{
+            background-color: {ThemeColors.SURFACE_LIGHT};
+            color: {ThemeColors.TEXT_PRIMARY};
+            border: 1px solid {ThemeColors.BORDER};
+            border-radius: 6px;
+            padding: 8px 22px;
+            font-size: 13px;
+        }}
+        QPushButton#resetCancelButton:hover {{ background-color: {ThemeColors.BORDER}; }}
+    """
+    # Cards de opção: a regra QLabel cobre as linhas descritivas de cada card
+    RESET_CARD_SAFE = f"""
+        QFrame {{
+            background-color: {ThemeColors.SURFACE};
+            border: 1px solid {ThemeColors.BORDER};
+            border-radius: 8px;
+        }}
+        QLabel {{ font-size: 12px; color: {ThemeColors.TEXT_SECONDARY}; padding-left: 20px; font-weight: normal; }}
+    """
+    RESET_CARD_DANGER = f"""
+        QFrame {{
+            background-color: #150808;
+            border: 1px solid {ThemeColors.DANGER};
+            border-radius: 8px;
+        }}
+        QLabel {{ font-size: 12px; color: #f87171; padding-left: 20px; font-weight: normal; }}
+    """
+
+    # Regras próprias da MainWindow; somadas aos estilos globais em MAIN_WINDOW_QSS (fim do módulo)
+    MAIN_WINDOW_RULES = f"""
+        #panelTitle {{ 
+            color: {ThemeColors.TEXT_PRIMARY}; 
+            font-size: 21px; 
+            font-weight: bold; 
+            padding: 10px; 
+        }}
+        #panelSubtitle {{ 
+            color: {ThemeColors.TEXT_SECONDARY}; 
+            font-size: 15px; 
+            padding-bottom: 15px; 
+        }}
+        #panelSeparator {{ background-color: {ThemeColors.BORDER}; width: 1px; }}
+        #modelLabel {{ color: #888888; font-style: italic; }}
+        #helpLabel {{ color: {ThemeColors.TEXT_TERTIARY}; font-size: 11px; font-style: italic; }}
+        #logLabel {{ font-weight: bold; color: {ThemeColors.TEXT_SECONDARY}; }}
+
+        QPushButton#folderButton {{
+            background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                stop:0 {ThemeColors.SURFACE_LIGHT}, stop:1 {ThemeColors.SURFACE});
+            border: 2px solid {ThemeColors.PRIMARY};
+            border-radius: 8px;
+            padding: 4px;
+        }}
+        QPushButton#folderButton:hover {{
+            background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                stop:0 #3d5a7f, stop:1 {ThemeColors.SURFACE_LIGHT});
+            border: 2px solid {ThemeColors.PRIMARY_HOVER};
+        }}
+        QPushButton#folderButton:pressed {{
+            background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                stop:0 {ThemeColors.SURFACE}, stop:1 #1a2f4f);
+            border: 2px solid {ThemeColors.PRIMARY_PRESSED};
+        }}
+
+        QPushButton#resetButton {{
+            background-color: #DC3545;
+            color: white;
+            border: none;
+            border-radius: 6px;
+            font-weight: bold;
+            font-size: 14px;
+        }}
+        QPushButton#resetButton:hover {{ background-color: #C82333; }}
+        QPushButton#resetButton:pressed {{ background-color: #BD2130; }}
+
+        QPushButton#logToggleButton {{
+            background: transparent; color: {ThemeColors.TEXT_SECONDARY};
+            border: 1px solid {ThemeColors.TEXT_SECONDARY}; border-radius: 4px;
+            font-size: 11px; padding: 0px 6px;
+        }}
+        QPushButton#logToggleButton:hover {{ color: {ThemeColors.PRIMARY}; border-color: {ThemeColors.PRIMARY}; }}
+        
+        #startButton {{
+            background-color: {ThemeColors.SUCCESS};
+            font-size: 15px; 
+            padding: 14px 20px;
+        }}
+        #startButton:hover {{ background-color: #059669; }}
+        #startButton:pressed {{ background-color: #047857; }}
+        
+        #statusLabel {{ font-weight: bold; font-size: 14px; }}
+        
+        #totalFrame {{
+            background-color: {ThemeColors.BACKGROUND};
+            border-radius: 8px;
+            border: 1px solid {ThemeColors.SURFACE};
+        }}
+
+        #videoFrame {{
+            background-color: {ThemeColors.BACKGROUND};
+            border-radius: 8px;
+            border: 1px solid {ThemeColors.SURFACE};
+        }}
+
+        #cardTitle {{
+            color: {ThemeColors.TEXT_PRIMARY}; font-size: 11px; font-weight: 600;
+            text-transform: uppercase; letter-spacing: 0.3px;
+        }}
+        #cardCount {{
+            color: {ThemeColors.TEXT_PRIMARY}; font-size: 36px; font-weight: 900;
+            padding: 4px 0 6px 0;
+            line-height: 1.0;
+            min-height: 45px;
+        }}
+        #cardDirection {{ color: {ThemeColors.TEXT_PRIMARY}; font-size: 14px; font-weight: 600; }}
+
+        /* QMessageBox, QMenu e QInputDialog herdam do pai por serem filhos da MainWindow */
+        QMessageBox {{
+            background-color: {ThemeColors.BACKGROUND};
+            color: {ThemeColors.TEXT_PRIMARY};
+        }}
+        QMessageBox QLabel {{
+            color: {ThemeColors.TEXT_PRIMARY};
+            background: transparent;
+            font-size: 13px;
+        }}
+        QMessageBox QPushButton {{
+            background-color: {ThemeColors.PRIMARY};
+            color: white;
+            border: none;
+            border-radius: 5px;
+            padding: 6px 18px;
+            min-width: 70px;
+            font-weight: bold;
+        }}
+        QMessageBox QPushButton:hover {{
+            background-color: {ThemeColors.PRIMARY_HOVER};
+        }}
+        QMessageBox QPushButton:default {{
+            background-color: {ThemeColors.PRIMARY};
+        }}
+
+        QMenu {{
+            background-color: {ThemeColors.SURFACE};
+            color: {ThemeColors.TEXT_PRIMARY};
+            border: 1px solid {ThemeColors.BORDER};
+            border-radius: 6px;
+            padding: 4px;
+        }}
+        QMenu::item {{
+            padding: 6px 24px 6px 12px;
+            border-radius: 4px;
+        }}
+        QMenu::item:selected {{
+            background-color: {ThemeColors.PRIMARY};
+            color: white;
+        }}
+        QMenu::item:disabled {{
+            color: {ThemeColors.TEXT_ALT};
+        }}
+        QMenu::separator {{
+            height: 1px;
+            background: {ThemeColors.BORDER};
+            margin: 4px 8px;
+        }}
+
+        QInputDialog {{
+            background-color: {ThemeColors.BACKGROUND};
+            color: {ThemeColors.TEXT_PRIMARY};
+        }}
+        QInputDialog QLabel {{
+            color: {ThemeColors.TEXT_PRIMARY};
+            background: transparent;
+            font-size: 13px;
+        }}
+        QInputDialog QLineEdit {{
+            background-color: {ThemeColors.SURFACE};
+            color: {ThemeColors.TEXT_PRIMARY};
+            border: 1px solid {ThemeColors.BORDER};
+            border-radius: 5px;
+            padding: 6px 10px;
+            font-size: 13px;
+        }}
+        QInputDialog QLineEdit:focus {{
+            border-color: {ThemeColors.PRIMARY};
+        }}
+        QInputDialog QPushButton {{
+            background-color: {ThemeColors.PRIMARY};
+            color: white;
+            border: none;
+            border-radius: 5px;
+            padding: 6px 18px;
+            min-width: 70px;
+            font-weight: bold;
+        }}
+        QInputDialog QPushButton:hover {{
+            background-color: {ThemeColors.PRIMARY_HOVER};
+        }}
+        QInputDialog QPushButton[text="Cancel"],
+        QInputDialog QPushButton[text="Cancelar"] {{
+            background-color: {ThemeColors.SURFACE};
+            color: {ThemeColors.TEXT_PRIMARY};
+            border: 1px solid {ThemeColors.BORDER};
+        }}
+        QInputDialog QPushButton[text="Cancel"]:hover,
+        QInputDialog QPushButton[text="Cancelar"]:hover {{
+            background-color: {ThemeColors.BORDER};
+        }}
+    """
+
+    # Rótulos próprios do ROIConfigDialog; somados aos estilos globais em ROI_DIALOG (fim do módulo)
+    ROI_DIALOG_RULES = f"""
+        QLabel#roiDialogHeader {{ font-size: 18px; font-weight: bold; color: {ThemeColors.TEXT_PRIMARY}; }}
+        QLabel#roiDialogInfo {{ color: {ThemeColors.TEXT_SECONDARY}; font-size: 12px; margin-bottom: 10px; }}
+        QLabel#roiDialogCanvas {{
+            background: {ThemeColors.BACKGROUND};
+            border: 2px solid {ThemeColors.SURFACE};
+            border-radius: 8px;
+        }}
+    """
+
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_card_style(color_hex):
-        """Gera estilo de card simples (sem gradiente)"""
+        """Gera estilo de card simples (sem gradiente), cacheado por cor"""
         return f"""
             QFrame {{
                 background-color: {color_hex};
@@ -600,6 +886,33 @@ class Styles:
         """
 
 # Sobrescrever estilos com caminhos absolutos de ícones
+# (os stylesheets pré-montados abaixo são compostos depois, já com estas versões)
 Styles.INPUT = get_input_styles_with_icons(ThemeColors)
 Styles.CHECKBOX = get_checkbox_styles_with_icons(ThemeColors)
 
+# Diálogo de configuração da linha (ROIConfigDialog): estilos globais + rótulos próprios
+Styles.ROI_DIALOG = (
+    Styles.MAIN_WINDOW +
+    Styles.INPUT +
+    Styles.BUTTON_PRIMARY +
+    Styles.BUTTON_SECONDARY +
+    Styles.PANEL +
+    Styles.ROI_DIALOG_RULES
+)
+
+# Stylesheet completo da MainWindow, montado uma única vez
+Styles.MAIN_WINDOW_QSS = (
+    Styles.MAIN_WINDOW +
+    Styles.PANEL +
+    Styles.BUTTON_PRIMARY +
+    Styles.BUTTON_SECONDARY +
+    Styles.INPUT +
+    Styles.TABLE +
+    Styles.SCROLLBAR +
+    Styles.TAB_WIDGET +
+    Styles.SLIDER +
+    Styles.CHECKBOX +
+    Styles.TEXT_EDIT +
+    Styles.COMBO_BOX_POPUP +  # Depois do INPUT: prevalece nas listas dos combos
+    Styles.MAIN_WINDOW_RULES
+)